@@ -0,0 +1,725 @@
+import re
+import copy
+from bisect import bisect_right
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from cache import MemoryCache, hash_json
+from document import MarkdownDocument, parse_markdown
+
+# Recent analyses by (content, requirements) hash. Streamlit reruns the
+# Analysis tab and the ZIP export on every widget interaction
+analysis_cache = MemoryCache(max_entries=32)
+
+##############################################################################
+# TERM MATCHER
+##############################################################################
+class TermMatcher:
+    """
+    Counts many terms in a token stream in one pass, using a trie of term tokens.
+
+    Counts follow the padded substring search analyze_content has always
+    used, ' term ' counted with str.count in ' ' + ' '.join(tokens) + ' ':
+    a term matches whole tokens only, and because each match consumes the
+    space after it, a repeat starting on the very next token is not counted
+    (the search resumes after that space).
+    """
+
+    def __init__(self, terms):
+        """
+        Args:
+            terms (iterable): Lowercased, stripped terms to count
+        """
+        self.root = {}
+        # Terms whose padded form can never line up with token boundaries
+        # (empty or with runs of spaces) keep the original string search
+        self.fallback_terms = set()
+        for term in terms:
+            parts = term.split(" ")
+            if not term or "" in parts:
+                self.fallback_terms.add(term)
+                continue
+            node = self.root
+            for part in parts:
+                node = node.setdefault(part, {})
+            node[None] = (term, len(parts))
+
+    def positions(self, tokens):
+        """
+        Finds the counted occurrences of every trie term in the token list.
+
+        Args:
+            tokens (list): Tokens of the normalized text
+
+        Returns:
+            dict: term -> ascending token offsets of its counted occurrences
+                (fallback terms and terms that never occur are left out)
+        """
+        positions = {}
+        # Token index from which each term may match again
+        next_start = {}
+        root = self.root
+        token_count = len(tokens)
+        for start in range(token_count):
+            node = root.get(tokens[start])
+            position = start + 1
+            while node is not None:
+                match = node.get(None)
+                if match is not None:
+                    term, length = match
+                    if start >= next_start.get(term, 0):
+                        positions.setdefault(term, []).append(start)
+                        # The trailing space is consumed, so skip one more token
+                        next_start[term] = start + length + 1
+                if position >= token_count:
+                    break
+                node = node.get(tokens[position])
+                position += 1
+        return positions
+
+    def count(self, tokens, token_text=None):
+        """
+        Counts every term in the token list.
+
+        Args:
+            tokens (list): Tokens of the normalized text
+            token_text (str): The padded text, only needed for fallback terms
+
+        Returns:
+            dict: term -> count (terms that never occur are left out)
+        """
+        counts = {term: len(offsets) for term, offsets in self.positions(tokens).items()}
+        if self.fallback_terms:
+            if token_text is None:
+                token_text = " " + " ".join(tokens) + " "
+            for term in self.fallback_terms:
+                counts[term] = token_text.count(f" {term} ")
+        return counts
+
+@lru_cache(maxsize=32)
+def compile_term_matcher(terms):
+    """
+    Returns the TermMatcher for a set of terms, built once and reused.
+
+    Args:
+        terms (tuple): Lowercased, stripped terms (a tuple so it can be a cache key)
+    """
+    return TermMatcher(terms)
+
+def padded_edge_matches(term):
+    """
+    Extra counts analyze_content adds for a term at the very start or end of
+    the padded token text (startswith(term + ' ') and endswith(' ' + term)).
+    The text always starts and ends with a space, so of the stripped terms
+    only the empty one matches, at both edges; kept so counts stay identical.
+    """
+    return 0 if term else 2
+
+##############################################################################
+# TOKENIZER
+##############################################################################
+# Normalization analyze_content has always applied, in this order: lowercase,
+# drop markdown heading lines, delete [*_`~], drop HTML tags, drop URLs, turn
+# newlines and punctuation into spaces, split on whitespace. The character
+# steps are str.translate tables and the regexes are compiled once
+FORMATTING_CHARS = str.maketrans("", "", "*_`~")
+PUNCTUATION_TO_SPACE = str.maketrans({char: " " for char in "\n\r.,;:!?()[]{}\"'-"})
+TAG_PATTERN = re.compile(r"<[^>]+>")
+URL_PATTERN = re.compile(r"https?://\S+")
+# Markdown heading lines (^#+\s+.*$, removed from the counted text) and
+# opening HTML heading tags (their text is counted). Starting on the [#<]
+# class lets the regex engine skip straight to candidate characters
+HEADING_PATTERN = re.compile(r"[#<](?:(?<=^#)#*\s+.*$|(?<=<)h([1-6])\b)", re.MULTILINE)
+HTML_HEADING_TEXT_PATTERN = re.compile(r"[^>]*>(.*?)</h\d\s*>", re.IGNORECASE | re.DOTALL)
+# Lines counted in analyze_content's heading_structure
+HEADING_LINE_PATTERN = re.compile(r"(#{1,6})\s+(.+)$")
+
+# A heading in the normalized text is replaced by (markdown) or prefixed
+# with (HTML) "\x00<n>\x00", n being its index. The marks are cut out while
+# splitting, so the tokens stay exactly those analyze_content counts in
+HEADING_MARK = "\x00"
+
+def count_heading_lines(text, heading_counts):
+    """Adds the lines of text that are markdown headings to heading_counts ({"H1": n, ...})."""
+    for line in text.split("\n"):
+        match = HEADING_LINE_PATTERN.match(line)
+        if match:
+            heading_counts[f"H{len(match.group(1))}"] += 1
+
+def tokenize_content(content):
+    """
+    Normalizes markdown or HTML into the tokens analyze_content counts in,
+    with the headings found on the way.
+
+    A single heading pass over the lowercased text records every markdown
+    heading line and HTML heading tag, counts the markdown heading levels
+    and leaves a mark where each heading starts; the marks become token
+    offsets when the normalized text is split.
+
+    Args:
+        content (str): Markdown or HTML content
+
+    Returns:
+        tuple: (tokens, headings, heading_counts). headings holds
+            {"level", "text", "start"} per heading in document order, start
+            being the token offset the heading begins at; headings the
+            normalization swallows (e.g. inside a URL) are left out.
+            heading_counts is {"H1": n, ..., "H6": n} over markdown heading lines
+    """
+    heading_counts = {"H1": 0, "H2": 0, "H3": 0, "H4": 0, "H5": 0, "H6": 0}
+    text = content.lower()
+
+    # Content that already holds the mark character cannot be marked safely
+    if HEADING_MARK in content:
+        text = re.sub(r'^#+\s+.*$', '', text, flags=re.MULTILINE)
+        count_heading_lines(content, heading_counts)
+        return normalize_text(text).split(), [], heading_counts
+
+    # Heading texts are read from the original when lowercasing kept the
+    # offsets (it nearly always does), so they keep their case
+    source = content if len(content) == len(text) else text
+    headings = []
+
+    def mark_heading(match):
+        mark = f"{HEADING_MARK}{len(headings)}{HEADING_MARK}"
+        if match.group(1) is None:
+            line = source[match.start():match.end()]
+            count_heading_lines(line, heading_counts)
+            headings.append({"level": len(line) - len(line.lstrip("#")), "text": line.lstrip("#").strip()})
+            return mark
+        text_match = HTML_HEADING_TEXT_PATTERN.match(source, match.end())
+        heading_text = TAG_PATTERN.sub("", text_match.group(1)).strip() if text_match else ""
+        headings.append({"level": int(match.group(1)), "text": heading_text})
+        return mark + match.group(0)
+
+    text = normalize_text(HEADING_PATTERN.sub(mark_heading, text))
+    if not headings:
+        return text.split(), [], heading_counts
+
+    return split_marked_text(text, headings) + (heading_counts,)
+
+def split_marked_text(text, headings):
+    """
+    Splits normalized text holding heading marks into tokens.
+
+    A mark with no whitespace on either side sits inside a token, which is
+    joined back up, exactly as if the mark had never been there.
+
+    Args:
+        text (str): Normalized text with "\x00<n>\x00" marks
+        headings (list): {"level", "text"} per mark number
+
+    Returns:
+        tuple: (tokens, headings located by token offset, see tokenize_content)
+    """
+    tokens = []
+    starts = {}
+    joined = False
+    for number, part in enumerate(text.split(HEADING_MARK)):
+        if number % 2:
+            starts[int(part)] = len(tokens) - 1 if joined else len(tokens)
+            continue
+        if not part:
+            continue
+        words = part.split()
+        if joined and words and not part[0].isspace():
+            tokens[-1] += words[0]
+            words = words[1:]
+        tokens.extend(words)
+        joined = not part[-1].isspace()
+
+    located = [dict(heading, start=starts[number]) for number, heading in enumerate(headings) if number in starts]
+    return tokens, located
+
+def tokenize_document(document):
+    """
+    Tokenizes a parsed MarkdownDocument from its element tree, the way
+    tokenize_content tokenizes its HTML but without stripping tags from a
+    string: heading text is counted, and the page wrapper's title and CSS
+    are never part of the text.
+
+    Args:
+        document (MarkdownDocument): Document from document.get_document
+
+    Returns:
+        tuple: (tokens, headings, heading_counts) as from tokenize_content,
+            with the heading counts of the parsed document
+    """
+    if document.tree is None:
+        return tokenize_content(document.markdown)
+
+    heading_counts = dict(document.heading_counts)
+    if any(HEADING_MARK in text for _, text in document.segments):
+        text = "".join(text for _, text in document.segments)
+        return normalize_text(text.lower()).split(), [], heading_counts
+
+    text = "".join(
+        text if number is None else f"{HEADING_MARK}{number}{HEADING_MARK}{text}"
+        for number, text in document.segments
+    )
+    tokens, headings = split_marked_text(normalize_text(text.lower()), document.headings)
+    return tokens, headings, heading_counts
+
+def normalize_text(text):
+    """
+    Applies the normalization steps after heading removal to lowercased
+    text; splitting the result on whitespace gives the tokens.
+    """
+    text = text.translate(FORMATTING_CHARS)
+    if "<" in text:
+        text = TAG_PATTERN.sub("", text)
+    if "://" in text:
+        text = URL_PATTERN.sub("", text)
+    return text.translate(PUNCTUATION_TO_SPACE)
+
+##############################################################################
+# CONTENT INDEX
+##############################################################################
+class ContentIndex:
+    """
+    Positional index of one article: the token offsets of every term and the
+    token span of every heading.
+
+    Built once per article by build_content_index; whole-document counts,
+    first-N-words checks and per-section counts are then all read from the
+    offsets instead of scanning the text again.
+    """
+
+    def __init__(self, tokens, headings, heading_counts, term_positions, term_counts):
+        """
+        Args:
+            tokens (list): Tokens of the normalized text
+            headings (list): {"level", "text", "start"} per heading, from tokenize_content
+            heading_counts (dict): Markdown heading lines per level, from tokenize_content
+            term_positions (dict): term -> ascending token offsets of its counted occurrences
+            term_counts (dict): term -> count, including terms without positions
+        """
+        self.tokens = tokens
+        self.headings = headings
+        self.heading_counts = heading_counts
+        self.term_positions = term_positions
+        self.term_counts = term_counts
+        self._token_text = None
+
+    @property
+    def word_count(self):
+        return len(self.tokens)
+
+    @property
+    def token_text(self):
+        """The tokens joined and padded with spaces, built on first use."""
+        if self._token_text is None:
+            self._token_text = ' ' + ' '.join(self.tokens) + ' '
+        return self._token_text
+
+    def count(self, term):
+        """Whole-document count of a lowercased, stripped term."""
+        return self.term_counts.get(term, 0)
+
+    def positions(self, term):
+        """Token offsets of a term's counted occurrences (empty for fallback terms)."""
+        return self.term_positions.get(term, [])
+
+    def in_first_words(self, term, words=100):
+        """True if an occurrence of the term starts within the first words tokens."""
+        offsets = self.positions(term)
+        return bool(offsets) and offsets[0] < words
+
+    def sections(self, level=2):
+        """
+        Splits the token stream at the headings of a level.
+
+        Text before the first such heading is returned as an introduction
+        section with heading None; deeper headings stay inside their section.
+
+        Returns:
+            list: {"heading", "start", "end", "words"} per section, in order
+        """
+        bounds = [(heading["text"], heading["start"]) for heading in self.headings if heading["level"] == level]
+        sections = []
+        intro_end = bounds[0][1] if bounds else self.word_count
+        if intro_end > 0 or not bounds:
+            sections.append({"heading": None, "start": 0, "end": intro_end})
+        for number, (text, start) in enumerate(bounds):
+            end = bounds[number + 1][1] if number + 1 < len(bounds) else self.word_count
+            sections.append({"heading": text, "start": start, "end": end})
+        for section in sections:
+            section["words"] = section["end"] - section["start"]
+        return sections
+
+    def section_counts(self, term, sections):
+        """
+        Counts a term's occurrences per section.
+
+        Args:
+            term (str): Lowercased, stripped term
+            sections (list): Sections from ContentIndex.sections
+
+        Returns:
+            list: Count per section, aligned with sections
+        """
+        counts = [0] * len(sections)
+        starts = [section["start"] for section in sections]
+        for offset in self.positions(term):
+            number = bisect_right(starts, offset) - 1
+            if number >= 0:
+                counts[number] += 1
+        return counts
+
+def build_content_index(content, terms):
+    """
+    Tokenizes the content once and indexes the given terms in it.
+
+    Args:
+        content (str or MarkdownDocument): Markdown or HTML content, or a parsed document
+        terms (iterable): Lowercased, stripped terms to index
+
+    Returns:
+        ContentIndex: The article's index
+    """
+    if isinstance(content, MarkdownDocument):
+        tokens, headings, heading_counts = tokenize_document(content)
+    else:
+        tokens, headings, heading_counts = tokenize_content(content)
+    matcher = compile_term_matcher(tuple(dict.fromkeys(terms)))
+    term_positions = matcher.positions(tokens)
+    term_counts = {term: len(offsets) for term, offsets in term_positions.items()}
+    index = ContentIndex(tokens, headings, heading_counts, term_positions, term_counts)
+    for term in matcher.fallback_terms:
+        term_counts[term] = index.token_text.count(f" {term} ")
+    return index
+
+##############################################################################
+# ANALYZE CONTENT
+##############################################################################
+def analyze_content(markdown_content, requirements):
+    """
+    Analyze the generated content against the SEO requirements.
+
+    markdown_content may be markdown, HTML or a parsed MarkdownDocument
+    (see document.py); with a document, heading_structure holds its heading counts.
+    """
+    primary_keyword = requirements.get("primary_keyword", "").lower().strip()
+    variations = requirements.get("variations", [])
+    lsi_keywords = requirements.get("lsi_keywords", {})
+    if isinstance(lsi_keywords, list):
+        lsi_keywords = {kw: 1 for kw in lsi_keywords}
+    entities = requirements.get("entities", [])
+
+    # Tokenize and index every term once (see build_content_index); all
+    # counts below are read from the index
+    terms = [primary_keyword] if primary_keyword else []
+    terms.extend(term.lower().strip() for term in variations)
+    terms.extend(term.lower().strip() for term in lsi_keywords)
+    terms.extend(term.lower().strip() for term in entities)
+    index = build_content_index(markdown_content, terms)
+    tokens = index.tokens
+
+    analysis = {
+        "primary_keyword": requirements.get("primary_keyword", ""),
+        "primary_keyword_count": 0,
+        "word_count": len(tokens),
+        "variations": requirements.get("variations", []),
+        "heading_structure": dict(index.heading_counts),
+        "lsi_keywords": {},
+        "entities": {}
+    }
+
+    # Count primary keyword - padded for exact match
+    if primary_keyword:
+        analysis["primary_keyword_count"] = index.count(primary_keyword)
+
+    # Process variations with our new exact matching approach
+    if variations:
+        analysis["variations"] = {}
+        for var in variations:
+            var_lower = var.lower().strip()
+            count = index.count(var_lower) + padded_edge_matches(var_lower)
+            status = "✅" if count > 0 else "❌"
+            analysis["variations"][var] = {
+                "count": count,
+                "status": status
+            }
+
+    # Process LSI keywords with exact matching approach
+    for keyword, target_count in lsi_keywords.items():
+        keyword_lower = keyword.lower().strip()
+        count = index.count(keyword_lower) + padded_edge_matches(keyword_lower)
+        status = "✅" if count >= target_count else "❌"
+        analysis["lsi_keywords"][keyword] = {
+            "count": count,
+            "target": target_count,
+            "status": status
+        }
+
+    # Process entities with exact matching approach
+    for entity in entities:
+        entity_lower = entity.lower().strip()
+        count = index.count(entity_lower) + padded_edge_matches(entity_lower)
+        status = "✅" if count > 0 else "❌"
+        analysis["entities"][entity] = {
+            "count": count,
+            "status": status
+        }
+
+    # Placement checks, read from the same index
+    analysis["primary_keyword_in_first_100_words"] = bool(primary_keyword) and index.in_first_words(primary_keyword, 100)
+
+    # Per-H2 coverage; "Introduction" is the text before the first H2
+    sections = index.sections(level=2)
+    term_groups = {
+        "primary_keyword": [primary_keyword] if primary_keyword else [],
+        "variations": [var.lower().strip() for var in variations],
+        "lsi_keywords": [keyword.lower().strip() for keyword in lsi_keywords],
+        "entities": [entity.lower().strip() for entity in entities]
+    }
+    section_term_counts = {}
+    for term in dict.fromkeys(terms):
+        counts = index.section_counts(term, sections)
+        if any(counts):
+            section_term_counts[term] = counts
+
+    analysis["sections"] = []
+    for number, section in enumerate(sections):
+        row = {"heading": section["heading"] or "Introduction", "words": section["words"]}
+        total = 0
+        for group, group_terms in term_groups.items():
+            group_count = sum(section_term_counts.get(term, [0] * len(sections))[number] for term in group_terms)
+            row[f"{group}_count"] = group_count
+            total += group_count
+        row["density"] = (total / section["words"]) * 100 if section["words"] > 0 else 0
+        analysis["sections"].append(row)
+    analysis["section_term_counts"] = section_term_counts
+
+    return analysis
+
+def analyze_content_cached(content, requirements):
+    """
+    Memoized analyze_content: returns the stored analysis while neither the
+    content nor the requirements change.
+
+    Callers get their own copy, so annotating the result (as the Analysis
+    tab does) never leaks into the cache.
+
+    Args:
+        content (str or MarkdownDocument): Content to analyze, see analyze_content
+        requirements (dict): Requirements the content is checked against
+
+    Returns:
+        dict: The analysis, see analyze_content
+    """
+    try:
+        if isinstance(content, MarkdownDocument):
+            key = hash_json(["document", content.markdown, requirements])
+        else:
+            key = hash_json([content, requirements])
+    except (TypeError, ValueError):
+        # Requirements that are not JSON-serializable cannot be keyed
+        return analyze_content(content, requirements)
+
+    analysis = analysis_cache.get(key)
+    if analysis is None:
+        analysis = analyze_content(content, requirements)
+        analysis_cache.set(key, analysis)
+    return copy.deepcopy(analysis)
+
+##############################################################################
+# BATCH SCORING
+##############################################################################
+# Term groups in the order of the per-group columns of score_articles
+TERM_GROUPS = ("primary_keyword", "variations", "lsi_keywords", "entities")
+
+def requirement_terms(requirements):
+    """
+    Lists the terms of a requirements set the way analyze_content checks them.
+
+    Returns:
+        list: (group, term, target) tuples; term is lowercased and stripped,
+            target is the count a term needs for a ✅ (1 except for LSI keywords)
+    """
+    entries = []
+    primary_keyword = requirements.get("primary_keyword", "").lower().strip()
+    if primary_keyword:
+        entries.append(("primary_keyword", primary_keyword, 1))
+    for var in requirements.get("variations", []):
+        entries.append(("variations", var.lower().strip(), 1))
+    lsi_keywords = requirements.get("lsi_keywords", {})
+    if isinstance(lsi_keywords, list):
+        lsi_keywords = {kw: 1 for kw in lsi_keywords}
+    for keyword, target_count in lsi_keywords.items():
+        entries.append(("lsi_keywords", keyword.lower().strip(), target_count))
+    for entity in requirements.get("entities", []):
+        entries.append(("entities", entity.lower().strip(), 1))
+    return entries
+
+def score_term_arrays(articles, requirements_list):
+    """
+    Counts every requirement term in every article of a campaign.
+
+    All articles are matched against one shared vocabulary with a single
+    compiled TermMatcher. The non-zero counts form a sparse (article, term)
+    matrix, stored as sorted keys, from which every requirement row is
+    looked up and checked at once with NumPy. Markdown is parsed and
+    tokenized as a MarkdownDocument, as the Analysis tab does, so counts
+    equal analyze_content's for the article's document.
+
+    Args:
+        articles (list): Markdown content or a parsed MarkdownDocument per article
+        requirements_list (list or dict): Requirements per article, in the
+            same order, or one requirements dict for every article
+
+    Returns:
+        dict: "vocabulary" (list of terms), "word_count" (per article) and
+            one array entry per (article, requirement term) row: "article",
+            "group" (index into TERM_GROUPS), "term" (vocabulary index),
+            "count", "target" and "met"
+
+    Raises:
+        ValueError: If the numbers of articles and requirements differ
+    """
+    if isinstance(requirements_list, dict):
+        requirements_list = [requirements_list] * len(articles)
+    if len(requirements_list) != len(articles):
+        raise ValueError(f"Got {len(articles)} articles but {len(requirements_list)} requirements")
+
+    # Requirement rows are built once per requirements object; a campaign
+    # usually scores many articles against a few reports
+    vocabulary = {}
+    templates = {}
+    article_rows = []
+    for requirements in requirements_list:
+        rows = templates.get(id(requirements))
+        if rows is None:
+            entries = requirement_terms(requirements)
+            rows = (
+                np.array([TERM_GROUPS.index(group) for group, _, _ in entries], dtype=np.int8),
+                np.array([vocabulary.setdefault(term, len(vocabulary)) for _, term, _ in entries], dtype=np.int64),
+                np.array([target for _, _, target in entries], dtype=np.float64)
+            )
+            templates[id(requirements)] = rows
+        article_rows.append(rows)
+
+    # Sparse count matrix: key article * V + term for every non-zero count
+    vocabulary_size = max(len(vocabulary), 1)
+    matcher = compile_term_matcher(tuple(vocabulary))
+    word_count = np.zeros(len(articles), dtype=np.int64)
+    count_keys = []
+    count_values = []
+    for number, content in enumerate(articles):
+        document = content if isinstance(content, MarkdownDocument) else parse_markdown(content)
+        tokens, _, _ = tokenize_document(document)
+        word_count[number] = len(tokens)
+        for term, count in matcher.count(tokens).items():
+            if count:
+                count_keys.append(number * vocabulary_size + vocabulary[term])
+                count_values.append(count)
+    count_keys = np.array(count_keys, dtype=np.int64)
+    count_values = np.array(count_values, dtype=np.int64)
+    order = np.argsort(count_keys)
+    count_keys = count_keys[order]
+    count_values = count_values[order]
+
+    row_lengths = [len(rows[1]) for rows in article_rows]
+    article = np.repeat(np.arange(len(articles), dtype=np.int64), row_lengths)
+    group = np.concatenate([rows[0] for rows in article_rows] or [np.empty(0, dtype=np.int8)])
+    term = np.concatenate([rows[1] for rows in article_rows] or [np.empty(0, dtype=np.int64)])
+    target = np.concatenate([rows[2] for rows in article_rows] or [np.empty(0, dtype=np.float64)])
+
+    count = np.zeros(len(term), dtype=np.int64)
+    if len(count_keys):
+        row_keys = article * vocabulary_size + term
+        found = np.minimum(np.searchsorted(count_keys, row_keys), len(count_keys) - 1)
+        hit = count_keys[found] == row_keys
+        count[hit] = count_values[found[hit]]
+    if "" in vocabulary:
+        count[term == vocabulary[""]] += padded_edge_matches("")
+
+    return {
+        "vocabulary": list(vocabulary),
+        "word_count": word_count,
+        "article": article,
+        "group": group,
+        "term": term,
+        "count": count,
+        "target": target,
+        "met": count >= target
+    }
+
+def score_article_terms(articles, requirements_list, names=None):
+    """
+    Per-term compliance of many articles, one row per (article, requirement term).
+
+    Args:
+        articles (list): Markdown content or a parsed MarkdownDocument per article
+        requirements_list (list or dict): Requirements per article, or one for all
+        names (list): Optional article names (e.g. file names) for the article column
+
+    Returns:
+        pandas.DataFrame: article, group, term, count, target and met columns
+    """
+    scores = score_term_arrays(articles, requirements_list)
+    article_names = np.asarray(names if names is not None else range(len(articles)), dtype=object)
+    return pd.DataFrame({
+        "article": article_names[scores["article"]],
+        "group": pd.Categorical.from_codes(scores["group"], TERM_GROUPS),
+        "term": np.asarray(scores["vocabulary"], dtype=object)[scores["term"]] if len(scores["term"]) else [],
+        "count": scores["count"],
+        "target": scores["target"],
+        "met": scores["met"]
+    })
+
+def score_articles(articles, requirements_list, names=None):
+    """
+    Compliance summary of many articles against their requirements.
+
+    Counts come from score_term_arrays and are aggregated per article with
+    np.bincount, so scoring a campaign does not call analyze_content for
+    every article.
+
+    Args:
+        articles (list): Markdown content or a parsed MarkdownDocument per article
+        requirements_list (list or dict): Requirements per article, or one for all
+        names (list): Optional article names to index the rows by
+
+    Returns:
+        pandas.DataFrame: One row per article with word_count and, for each
+            term group, <group>_count (occurrences), <group>_met / <group>_total
+            (terms at target), <group>_density (% of words) and
+            <group>_pass_rate, plus the overall terms_met, terms_total and
+            pass_rate
+    """
+    scores = score_term_arrays(articles, requirements_list)
+    article_count = len(articles)
+    group_count = len(TERM_GROUPS)
+    cells = scores["article"] * group_count + scores["group"]
+
+    def per_group(weights):
+        totals = np.bincount(cells, weights=weights, minlength=article_count * group_count)
+        return totals.reshape(article_count, group_count)
+
+    occurrences = per_group(scores["count"])
+    met = per_group(scores["met"])
+    totals = per_group(None)
+    words = scores["word_count"].astype(np.float64)
+
+    summary = {"word_count": scores["word_count"]}
+    for number, group in enumerate(TERM_GROUPS):
+        summary[f"{group}_count"] = occurrences[:, number].astype(np.int64)
+        summary[f"{group}_met"] = met[:, number].astype(np.int64)
+        summary[f"{group}_total"] = totals[:, number].astype(np.int64)
+        summary[f"{group}_density"] = np.divide(
+            occurrences[:, number] * 100, words, out=np.zeros(article_count), where=words > 0
+        )
+        summary[f"{group}_pass_rate"] = np.divide(
+            met[:, number], totals[:, number], out=np.zeros(article_count), where=totals[:, number] > 0
+        )
+    terms_met = met.sum(axis=1)
+    terms_total = totals.sum(axis=1)
+    summary["terms_met"] = terms_met.astype(np.int64)
+    summary["terms_total"] = terms_total.astype(np.int64)
+    summary["pass_rate"] = np.divide(terms_met, terms_total, out=np.zeros(article_count), where=terms_total > 0)
+
+    index = pd.Index(names if names is not None else range(article_count), name="article")
+    return pd.DataFrame(summary, index=index)
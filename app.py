@@ -1,13 +1,16 @@
 import streamlit as st
 import pandas as pd
-import re
 import warnings
-from main import parse_cora_report, generate_content, generate_meta_and_headings, markdown_to_html, generate_content_from_headings
+from analysis import analyze_content_cached
+from document import get_document
+from cache import hash_bytes
+from main import parse_cora_report_cached, generate_content, generate_meta_and_headings, markdown_to_html, generate_content_from_headings, warm_up_claude_client, calculate_token_cost, collect_missing_terms, repair_content
 import os
 from collections import Counter
 import io
 import zipfile
 import json
+import time
 warnings.filterwarnings("ignore", category=UserWarning, module="openpyxl.styles.stylesheet")
 
 # Streamlit page configuration
@@ -59,125 +62,26 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Utility function to analyze content
-def analyze_content(markdown_content, requirements):
-    """Analyze the generated content against the SEO requirements."""
-    # First, we need to extract just the text content without markdown formatting
-    # Basic markdown removal
-    text_content = markdown_content.lower()
-    # Remove headers
-    text_content = re.sub(r'^#+\s+.*$', '', text_content, flags=re.MULTILINE)
-    # Remove emphasis and other markdown formatting
-    text_content = re.sub(r'[*_`~]', '', text_content)
-    # Remove HTML tags
-    text_content = re.sub(r'<[^>]+>', '', text_content)
-    # Remove URLs
-    text_content = re.sub(r'https?://\S+', '', text_content)
-    # Replace newlines and punctuation with spaces
-    text_content = re.sub(r'[\n\r.,;:!?()[\]{}"\'-]', ' ', text_content)
-    # Normalize spaces
-    text_content = re.sub(r'\s+', ' ', text_content).strip()
-    
-    # Let's create a token-based approach with explicit word boundary checking
-    # First, split into tokens (words)
-    tokens = text_content.split()
-    
-    # Create a special token lookup with space padding to ensure whole word matching
-    # This is a completely different approach that won't rely on regex word boundaries
-    token_text = ' ' + ' '.join(tokens) + ' '
-    
-    analysis = {
-        "primary_keyword": requirements.get("primary_keyword", ""),
-        "primary_keyword_count": 0,
-        "word_count": len(tokens),
-        "variations": requirements.get("variations", []),
-        "heading_structure": {"H1": 0, "H2": 0, "H3": 0, "H4": 0, "H5": 0, "H6": 0},
-        "lsi_keywords": {},
-        "entities": {}
-    }
-    
-    # Count primary keyword - padded for exact match
-    primary_keyword = requirements.get("primary_keyword", "").lower().strip()
-    if primary_keyword:
-        # Here's our new approach - exact padded word/phrase match
-        search_term = f" {primary_keyword} "
-        analysis["primary_keyword_count"] = token_text.count(search_term)
-    
-    # Extract and count headings
-    heading_pattern = r"^(#{1,6})\s+(.+)$"
-    for line in markdown_content.split("\n"):
-        match = re.match(heading_pattern, line)
-        if match:
-            heading_level = f"H{len(match.group(1))}"
-            analysis["heading_structure"][heading_level] += 1
-    
-    # Process variations with our new exact matching approach
-    variations = requirements.get("variations", [])
-    if variations:
-        analysis["variations"] = {}
-        for var in variations:
-            var_lower = var.lower().strip()
-            # Pad with spaces to ensure it's a complete word/phrase match
-            search_term = f" {var_lower} "
-            count = token_text.count(search_term)
-            
-            # Handle special case for variation at start or end of text
-            if token_text.startswith(var_lower + ' '):
-                count += 1
-            if token_text.endswith(' ' + var_lower):
-                count += 1
-                
-            status = "✅" if count > 0 else "❌"
-            analysis["variations"][var] = {
-                "count": count,
-                "status": status
-            }
+def render_token_usage(title, token_usage):
+    """
+    Shows the token counts and cost of one generation step in the sidebar.
     
-    # Process LSI keywords with exact matching approach
-    lsi_keywords = requirements.get("lsi_keywords", {})
-    if isinstance(lsi_keywords, list):
-        lsi_keywords = {kw: 1 for kw in lsi_keywords}
-
-    for keyword, target_count in lsi_keywords.items():
-        keyword_lower = keyword.lower().strip()
-        # Exact match with space padding
-        search_term = f" {keyword_lower} "
-        count = token_text.count(search_term)
-        
-        # Handle special case for keyword at start or end of text
-        if token_text.startswith(keyword_lower + ' '):
-            count += 1
-        if token_text.endswith(' ' + keyword_lower):
-            count += 1
-            
-        status = "✅" if count >= target_count else "❌"
-        analysis["lsi_keywords"][keyword] = {
-            "count": count,
-            "target": target_count,
-            "status": status
-        }
+    Input tokens include prompt-cache reads and writes, which are priced
+    separately (see calculate_token_cost). Returns the step's total cost.
+    """
+    input_cost, output_cost, total_cost = calculate_token_cost(token_usage)
+    cache_read_tokens = token_usage.get('cache_read_input_tokens', 0)
+    cache_write_tokens = token_usage.get('cache_creation_input_tokens', 0)
+    input_tokens = token_usage['input_tokens'] + cache_read_tokens + cache_write_tokens
     
-    # Process entities with exact matching approach
-    entities = requirements.get("entities", [])
-    for entity in entities:
-        entity_lower = entity.lower().strip()
-        # Exact match with space padding
-        search_term = f" {entity_lower} "
-        count = token_text.count(search_term)
-        
-        # Handle special case for entity at start or end of text
-        if token_text.startswith(entity_lower + ' '):
-            count += 1
-        if token_text.endswith(' ' + entity_lower):
-            count += 1
-            
-        status = "✅" if count > 0 else "❌"
-        analysis["entities"][entity] = {
-            "count": count,
-            "status": status
-        }
-        
-    return analysis
+    st.sidebar.markdown(f"### {title}")
+    col1, col2, col3 = st.sidebar.columns(3)
+    col1.metric("Input Tokens", input_tokens, delta=f"${input_cost:.4f}", delta_color="off")
+    col2.metric("Output Tokens", token_usage['output_tokens'], delta=f"${output_cost:.4f}", delta_color="off")
+    col3.metric("Total Tokens", token_usage['total_tokens'], delta=f"${total_cost:.4f}", delta_color="off")
+    if cache_read_tokens or cache_write_tokens:
+        st.sidebar.caption(f"Prompt cache: {cache_read_tokens} input tokens read, {cache_write_tokens} written")
+    return total_cost
 
 
 def render_extracted_data():
@@ -359,6 +263,8 @@ with st.sidebar:
         help="Enter your Anthropic API key. This will not be stored permanently."
     )
     st.session_state['anthropic_api_key'] = anthropic_api_key
+    # Open the shared connection as soon as the key is entered
+    warm_up_claude_client(anthropic_api_key)
     
     openai_api = st.text_input(
         "OpenAI API Key (Optional)",
@@ -368,6 +274,20 @@ with st.sidebar:
     )
     st.session_state['openai_api'] = openai_api
     
+    st.checkbox(
+        "Reuse cached AI responses",
+        value=True,
+        key="use_response_cache",
+        help="Identical requests are answered from the local response cache. 'Regenerate Content' always asks Claude again."
+    )
+    
+    st.checkbox(
+        "Write sections in parallel",
+        value=False,
+        key="parallel_sections",
+        help="Writes each H2 section at the same time and stitches them together. Long articles finish much sooner; the preview fills in section by section."
+    )
+    
     if not anthropic_api_key:
         st.warning("Please enter your Anthropic API key to use this app.")
     
@@ -375,36 +295,15 @@ with st.sidebar:
         # Display heading token usage if available
         heading_total_cost = 0
         if 'heading_token_usage' in st.session_state:
-            heading_token_usage = st.session_state['heading_token_usage']
-            heading_input_cost = (heading_token_usage['input_tokens'] / 1000000) * 3
-            heading_output_cost = (heading_token_usage['output_tokens'] / 1000000) * 15
-            heading_total_cost = heading_input_cost + heading_output_cost
-            
-            st.sidebar.markdown("### Heading Generation Token Usage")
-            col1, col2, col3 = st.sidebar.columns(3)
-            col1.metric("Input Tokens", heading_token_usage['input_tokens'], delta=f"${heading_input_cost:.4f}", delta_color="off")
-            col2.metric("Output Tokens", heading_token_usage['output_tokens'], delta=f"${heading_output_cost:.4f}", delta_color="off")
-            col3.metric("Total Tokens", heading_token_usage['total_tokens'], delta=f"${heading_total_cost:.4f}", delta_color="off")
+            heading_total_cost = render_token_usage("Heading Generation Token Usage", st.session_state['heading_token_usage'])
         
         # Display content token usage if available
         if 'content_token_usage' in st.session_state:
-            token_usage = st.session_state['content_token_usage']
-            input_cost = (token_usage['input_tokens'] / 1000000) * 3
-            output_cost = (token_usage['output_tokens'] / 1000000) * 15
-            total_cost = input_cost + output_cost
-            
-            st.sidebar.markdown("### Content Generation Token Usage")
-            col1, col2, col3 = st.sidebar.columns(3)
-            col1.metric("Input Tokens", token_usage['input_tokens'], delta=f"${input_cost:.4f}", delta_color="off")
-            col2.metric("Output Tokens", token_usage['output_tokens'], delta=f"${output_cost:.4f}", delta_color="off")
-            col3.metric("Total Tokens", token_usage['total_tokens'], delta=f"${total_cost:.4f}", delta_color="off")
+            render_token_usage("Content Generation Token Usage", st.session_state['content_token_usage'])
         
         # Display combined cost if both tokens are available
         if 'content_token_usage' in st.session_state and 'heading_token_usage' in st.session_state:
-            content_token_usage = st.session_state['content_token_usage']
-            content_input_cost = (content_token_usage['input_tokens'] / 1000000) * 3
-            content_output_cost = (content_token_usage['output_tokens'] / 1000000) * 15
-            content_total_cost = content_input_cost + content_output_cost
+            _, _, content_total_cost = calculate_token_cost(st.session_state['content_token_usage'])
             
             combined_total_cost = content_total_cost + heading_total_cost
             st.sidebar.markdown("### Combined Total Cost")
@@ -423,8 +322,8 @@ def process_upload():
         file = st.session_state['file']
         
         with st.spinner("Processing CORA report..."):
-            # Parse the CORA report
-            requirements = parse_cora_report(file)
+            # Parse the CORA report (cached by content hash for repeat uploads)
+            requirements = parse_cora_report_cached(file.getvalue(), strict=True)
             
             # Ensure lsi_keywords is a dictionary
             if isinstance(requirements.get('lsi_keywords', {}), list):
@@ -467,9 +366,25 @@ def generate_content_flow():
             print("CONTENT_FLOW: Auto-generate flag is set, initiating API call")
             st.session_state.pop('auto_generate_content', None)
             try:
+                # Live preview that the article is streamed into as it is written;
+                # replaced by the Preview tab once the content is saved
+                live_preview = st.empty()
+                streamed_chunks = []
+                last_render = [0.0]
+                
                 with st.status("Generating content...") as status:
                     status.update(label="🧠 Claude is thinking about your content...", state="running")
                     
+                    def render_streamed_text(delta):
+                        if not streamed_chunks:
+                            status.update(label="✍️ Claude is writing your content...", state="running")
+                        streamed_chunks.append(delta)
+                        # Throttle re-renders; markdown of a long article is not free
+                        now = time.monotonic()
+                        if now - last_render[0] >= 0.25:
+                            live_preview.markdown("".join(streamed_chunks))
+                            last_render[0] = now
+                    
                     updated_requirements = dict(st.session_state.requirements)
                     
                     # Add meta title and description to requirements for the API call
@@ -484,7 +399,13 @@ def generate_content_flow():
                     result = generate_content_from_headings(
                         updated_requirements,
                         st.session_state.meta_and_headings.get("heading_structure", ""),
-                        {"anthropic_api_key": st.session_state.get('anthropic_api_key', '')}
+                        {
+                            "anthropic_api_key": st.session_state.get('anthropic_api_key', ''),
+                            # Deliberate regenerations skip the response cache
+                            "use_cache": st.session_state.get('use_response_cache', True) and not st.session_state.pop('bypass_response_cache', False),
+                            "parallel_sections": st.session_state.get('parallel_sections', False)
+                        },
+                        on_text=render_streamed_text
                     )
                     
                     markdown_content = result.get('markdown', '')
@@ -492,32 +413,21 @@ def generate_content_flow():
                     save_path = result.get('filename', '')
                     # Try to get token usage from the API result; if empty, fallback to previously stored value
                     token_usage = result.get('token_usage', {}) or st.session_state.get('content_token_usage', {})
+                    # Cache hits and section-parallel runs have no time to first token;
+                    # don't leave the previous run's on screen
+                    if 'time_to_first_token' in result.get('token_usage', {}):
+                        st.session_state['content_time_to_first_token'] = result['token_usage']['time_to_first_token']
+                    else:
+                        st.session_state.pop('content_time_to_first_token', None)
                     if token_usage:
-                        input_cost = (token_usage['input_tokens'] / 1000000) * 3
-                        output_cost = (token_usage['output_tokens'] / 1000000) * 15
-                        total_cost = input_cost + output_cost
-                        
                         st.session_state['content_token_usage'] = token_usage
                         
-                        st.sidebar.markdown("### Content Generation Token Usage")
-                        col1, col2, col3 = st.sidebar.columns(3)
-                        col1.metric("Input Tokens", token_usage['input_tokens'], delta=f"${input_cost:.4f}", delta_color="off")
-                        col2.metric("Output Tokens", token_usage['output_tokens'], delta=f"${output_cost:.4f}", delta_color="off")
-                        col3.metric("Total Tokens", token_usage['total_tokens'], delta=f"${total_cost:.4f}", delta_color="off")
+                        total_cost = render_token_usage("Content Generation Token Usage", token_usage)
                         
                         # Also display heading cost if available
                         heading_total_cost = 0
                         if 'heading_token_usage' in st.session_state:
-                            heading_token_usage = st.session_state['heading_token_usage']
-                            heading_input_cost = (heading_token_usage['input_tokens'] / 1000000) * 3
-                            heading_output_cost = (heading_token_usage['output_tokens'] / 1000000) * 15
-                            heading_total_cost = heading_input_cost + heading_output_cost
-                            
-                            st.sidebar.markdown("### Heading Generation Token Usage")
-                            col1, col2, col3 = st.sidebar.columns(3)
-                            col1.metric("Input Tokens", heading_token_usage['input_tokens'], delta=f"${heading_input_cost:.4f}", delta_color="off")
-                            col2.metric("Output Tokens", heading_token_usage['output_tokens'], delta=f"${heading_output_cost:.4f}", delta_color="off")
-                            col3.metric("Total Tokens", heading_token_usage['total_tokens'], delta=f"${heading_total_cost:.4f}", delta_color="off")
+                            heading_total_cost = render_token_usage("Heading Generation Token Usage", st.session_state['heading_token_usage'])
                         
                         combined_total_cost = total_cost + heading_total_cost
                         st.sidebar.markdown("### Combined Total Cost")
@@ -530,8 +440,7 @@ def generate_content_flow():
                         st.session_state['generated_html'] = html_content
                     else:
                         try:
-                            import markdown
-                            st.session_state['generated_html'] = markdown.markdown(markdown_content)
+                            st.session_state['generated_html'] = get_document(markdown_content).html
                         except Exception as e:
                             st.session_state['generated_html'] = "<p>Error displaying HTML preview</p>"
                             status.update(label=f"⚠️ Content generated, but HTML preview may have errors: {str(e)}", state="complete")
@@ -555,11 +464,12 @@ def generate_content_flow():
     if content_exists:
         st.success("Content generated successfully!")
         st.subheader("Generated Content")
+        if st.session_state.get('content_time_to_first_token') is not None:
+            st.caption(f"Time to first token: {st.session_state['content_time_to_first_token']:.1f}s")
         
         if 'generated_html' not in st.session_state or not st.session_state['generated_html']:
             try:
-                import markdown
-                st.session_state['generated_html'] = markdown.markdown(st.session_state['generated_markdown'])
+                st.session_state['generated_html'] = get_document(st.session_state['generated_markdown']).html
             except Exception as e:
                 st.session_state['generated_html'] = "<p>Error displaying HTML preview</p>"
                 st.warning(f"Could not generate HTML preview: {str(e)}")
@@ -604,8 +514,9 @@ def generate_content_flow():
         
         with tab3:
             with st.spinner("Analyzing content..."):
-                html_content = st.session_state['generated_html']
-                analysis = analyze_content(html_content, st.session_state.requirements)
+                # The article parsed once per version; analysis reads its element tree
+                document = get_document(st.session_state['generated_markdown'])
+                analysis = analyze_content_cached(document, st.session_state.requirements)
                 # Get meta title and description from session state instead of direct variables
                 meta_title = st.session_state.meta_and_headings.get("meta_title", "")
                 meta_description = st.session_state.meta_and_headings.get("meta_description", "")
@@ -620,11 +531,39 @@ def generate_content_flow():
                 headings = ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']
                 heading_counts = []
                 for h in headings:
-                    count = len(re.findall(f"<{h}[^>]*>.*?</{h}>", html_content, flags=re.IGNORECASE | re.DOTALL))
+                    count = document.heading_counts[h.upper()]
                     analysis[f'{h}_count'] = count
                     heading_counts.append(f"{h.upper()} Tags: {count}")
                 st.write(" | ".join(heading_counts))
-                
+
+                first_words_status = "✅" if analysis.get('primary_keyword_in_first_100_words') else "❌"
+                st.write(f"**Primary Keyword in First 100 Words:** {first_words_status}")
+
+                if analysis.get('sections'):
+                    st.write("**Keyword Coverage by Section (H2):**")
+                    section_df = pd.DataFrame(analysis['sections']).rename(columns={
+                        'heading': 'Section', 'words': 'Words', 'primary_keyword_count': 'Primary',
+                        'variations_count': 'Variations', 'lsi_keywords_count': 'LSI',
+                        'entities_count': 'Entities', 'density': 'Density %'
+                    })
+                    st.dataframe(section_df.round({'Density %': 2}), use_container_width=True)
+
+                    if analysis.get('section_term_counts'):
+                        st.write("**Keyword Distribution Heatmap:**")
+                        # Numbered labels: two sections can share a heading, and Styler needs unique columns
+                        heatmap_df = pd.DataFrame(
+                            analysis['section_term_counts'],
+                            index=[f"{number}. {section['heading']}" for number, section in enumerate(analysis['sections'], 1)]
+                        ).T
+                        peak = max(heatmap_df.max().max(), 1)
+                        st.dataframe(
+                            heatmap_df.style.map(
+                                lambda count: f"background-color: rgba(46, 160, 67, {count / peak:.2f})" if count else ""
+                            ),
+                            use_container_width=True,
+                            height=300
+                        )
+
                 if analysis.get('lsi_keywords'):
                     total_lsi = sum(info['count'] for info in analysis['lsi_keywords'].values())
                     st.write("**LSI Keyword Usage**")
@@ -708,12 +647,38 @@ def generate_content_flow():
                     all_keywords_data = [{'Keyword': k, 'Count': cnt} for k, cnt in all_keywords.items()]
                     all_keywords_df = pd.DataFrame(all_keywords_data).sort_values(by='Count', ascending=False).reset_index(drop=True)
                     st.dataframe(all_keywords_df, use_container_width=True, height=300)
+                
+                missing_terms = collect_missing_terms(analysis)
+                if missing_terms:
+                    st.write(f"**Missing or under-target terms:** {len(missing_terms)}")
+                    if st.button("Repair Missing Terms", help="Rewrites only the paragraphs needed to add the missing terms, instead of regenerating the whole article"):
+                        with st.spinner("Repairing paragraphs..."):
+                            repaired = repair_content(
+                                st.session_state['generated_markdown'],
+                                analysis,
+                                st.session_state.requirements,
+                                {
+                                    "anthropic_api_key": st.session_state.get('anthropic_api_key', ''),
+                                    "use_cache": st.session_state.get('use_response_cache', True)
+                                }
+                            )
+                        st.session_state['generated_markdown'] = repaired['markdown']
+                        st.session_state['generated_html'] = repaired['html']
+                        st.session_state['save_path'] = repaired['filename']
+                        if repaired['token_usage']:
+                            st.session_state['repair_token_usage'] = repaired['token_usage']
+                        st.rerun()
+                
+                if st.session_state.get('repair_token_usage'):
+                    render_token_usage("Repair Token Usage", st.session_state['repair_token_usage'])
 
         
         if st.button("Regenerate Content"):
             del st.session_state['generated_markdown']
             del st.session_state['generated_html']
+            st.session_state.pop('repair_token_usage', None)
             st.session_state['auto_generate_content'] = True
+            st.session_state['bypass_response_cache'] = True
             st.rerun()
         
         if st.button("Start Over"):
@@ -728,16 +693,7 @@ if st.session_state.get("step", 1) == 2.5:
     meta_and_headings = st.session_state.meta_and_headings
     
     if 'token_usage' in meta_and_headings:
-        token_usage = meta_and_headings['token_usage']
-        input_cost = (token_usage['input_tokens'] / 1000000) * 3
-        output_cost = (token_usage['output_tokens'] / 1000000) * 15
-        total_cost = input_cost + output_cost
-        
-        st.sidebar.markdown("### Token Usage")
-        col1, col2, col3 = st.sidebar.columns(3)
-        col1.metric("Input Tokens", token_usage['input_tokens'], delta=f"${input_cost:.4f}", delta_color="off")
-        col2.metric("Output Tokens", token_usage['output_tokens'], delta=f"${output_cost:.4f}", delta_color="off")
-        col3.metric("Total Tokens", token_usage['total_tokens'], delta=f"${total_cost:.4f}", delta_color="off")
+        render_token_usage("Token Usage", meta_and_headings['token_usage'])
     
     st.subheader("Generated Meta Information and Heading Structure")
     
@@ -846,21 +802,8 @@ if st.session_state.get("step", 1) == 2.5:
                 "h6": requirements.get('requirements', {}).get('Number of H6 tags', 0)
             })
         
-        # Count actual headings in the markdown
-        actual_headings = {"h1": 0, "h2": 0, "h3": 0, "h4": 0, "h5": 0, "h6": 0}
-        
-        for line in heading_structure_input.split('\n'):
-            if line.strip().startswith('#'):
-                # Count consecutive # symbols at the start of the line
-                heading_level = 0
-                for char in line.strip():
-                    if char == '#':
-                        heading_level += 1
-                    else:
-                        break
-                
-                if 1 <= heading_level <= 6:
-                    actual_headings[f"h{heading_level}"] += 1
+        # Count actual headings in the markdown, as the parser will see them
+        actual_headings = {level.lower(): count for level, count in get_document(heading_structure_input).heading_counts.items()}
         
         # Display the heading count comparison
         st.write("### Heading Count Comparison")
@@ -987,6 +930,7 @@ if st.session_state.get("step", 1) == 2:
                     settings = {
                         'model': 'claude',
                         'anthropic_api_key': st.session_state.get('anthropic_api_key', ''),
+                        'use_cache': st.session_state.get('use_response_cache', True),
                     }
                     
                     status = st.status("Generating meta and headings...", expanded=True)
@@ -1030,16 +974,7 @@ if st.session_state.get("step", 1) == 2:
                             st.session_state['heading_token_usage'] = meta_and_headings['token_usage']
                             
                             # Display token usage for heading generation in sidebar
-                            heading_token_usage = meta_and_headings['token_usage']
-                            heading_input_cost = (heading_token_usage['input_tokens'] / 1000000) * 3
-                            heading_output_cost = (heading_token_usage['output_tokens'] / 1000000) * 15
-                            heading_total_cost = heading_input_cost + heading_output_cost
-                            
-                            st.sidebar.markdown("### Heading Generation Token Usage")
-                            col1, col2, col3 = st.sidebar.columns(3)
-                            col1.metric("Input Tokens", heading_token_usage['input_tokens'], delta=f"${heading_input_cost:.4f}", delta_color="off")
-                            col2.metric("Output Tokens", heading_token_usage['output_tokens'], delta=f"${heading_output_cost:.4f}", delta_color="off")
-                            col3.metric("Total Tokens", heading_token_usage['total_tokens'], delta=f"${heading_total_cost:.4f}", delta_color="off")
+                            render_token_usage("Heading Generation Token Usage", meta_and_headings['token_usage'])
                         
                         st.session_state['meta_and_headings'] = meta_and_headings
                         st.session_state['original_meta_and_headings'] = dict(meta_and_headings)
@@ -1084,7 +1019,7 @@ def create_download_zip():
     md_content = st.session_state.get("generated_markdown", "")
     html_content = st.session_state.get("generated_html", "")
     requirements = st.session_state.get("requirements", {})
-    analysis = analyze_content(html_content, requirements)
+    analysis = analyze_content_cached(get_document(md_content), requirements)
     
     extracted_data = f"Primary Keyword: {requirements.get('primary_keyword', 'Not found')}\n"
     extracted_data += f"Word Count Target: {requirements.get('word_count', 'N/A')} words\n"
@@ -1136,10 +1071,17 @@ def create_download_zip():
     zip_buffer.seek(0)
     return zip_buffer
 
-zip_buffer = create_download_zip()
-st.download_button(
-    label="Download All as ZIP",
-    data=zip_buffer,
-    file_name="seo_content_package.zip",
-    mime="application/zip"
-)
+# The package is only built when asked for, and kept until the content changes
+if st.session_state.get("generated_markdown"):
+    package_key = hash_bytes((st.session_state["generated_markdown"] + st.session_state.get("generated_html", "")).encode("utf-8"))
+    prepared_zip = st.session_state.get("download_zip")
+    if prepared_zip and prepared_zip[0] == package_key:
+        st.download_button(
+            label="Download All as ZIP",
+            data=prepared_zip[1],
+            file_name="seo_content_package.zip",
+            mime="application/zip"
+        )
+    elif st.button("Prepare ZIP Download"):
+        st.session_state["download_zip"] = (package_key, create_download_zip().getvalue())
+        st.rerun()
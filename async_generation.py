@@ -0,0 +1,223 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import functools
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from main import OUTPUT_DIR, generate_meta_and_headings, generate_content_from_headings
+
+# Each job writes its prompts and article to its own folder under here, so
+# concurrent jobs (even for the same keyword) never overwrite each other's files
+ASYNC_OUTPUT_DIR = os.path.join(OUTPUT_DIR, "async")
+
+##############################################################################
+# SINGLE ARTICLE
+##############################################################################
+async def generate_article_async(index, requirements, settings, semaphore, executor=None, timeout=None, on_progress=None, total=1):
+    """
+    Runs the heading and content stages for one requirements dict.
+
+    Each stage runs the existing synchronous generator in a worker thread.
+    The semaphore is held only while a stage is talking to the API, so one
+    job's content stage can overlap another job's heading stage.
+
+    The timeout counts only the time the job's stages spend on a worker,
+    not time queued behind other jobs. A timed-out stage stops being
+    awaited, but its thread runs until the API call returns (threads cannot
+    be cancelled) and keeps its semaphore slot until then, so no other job
+    is handed a slot without a free thread behind it.
+
+    Args:
+        index (int): Position of the job in the batch
+        requirements (dict): Requirements from parse_cora_report
+        settings (dict): Settings passed to the generators (model, anthropic_api_key, output_dir)
+        semaphore (asyncio.Semaphore): Limits concurrent API calls; one slot per executor thread
+        executor (ThreadPoolExecutor): Threads to run the stages on (defaults to the loop's)
+        timeout (float): Seconds of running time allowed for the whole job (None for no limit)
+        on_progress (callable): Called with a progress event dict
+        total (int): Number of jobs in the batch, reported in progress events
+
+    Returns:
+        dict: Job record with "ok", "meta_and_headings" and "content" or "error"
+    """
+    primary_keyword = requirements.get("primary_keyword", "")
+    start_time = time.perf_counter()
+    # Seconds the job's stages have run on a worker so far
+    running_time = [0.0]
+
+    def report(stage):
+        if on_progress:
+            on_progress({
+                "index": index,
+                "total": total,
+                "primary_keyword": primary_keyword,
+                "stage": stage,
+                "elapsed": round(time.perf_counter() - start_time, 3)
+            })
+
+    loop = asyncio.get_running_loop()
+
+    def release_slot(future):
+        semaphore.release()
+        # Retrieve the outcome of an abandoned call so it is not logged as unhandled
+        if not future.cancelled():
+            future.exception()
+
+    async def run_stage(func):
+        await semaphore.acquire()
+        stage_start = time.perf_counter()
+        future = loop.run_in_executor(executor, func)
+        future.add_done_callback(release_slot)
+        remaining = None if timeout is None else max(timeout - running_time[0], 0)
+        try:
+            # shield: a timeout abandons the call without cancelling the
+            # future, so the slot is released only when the thread is free
+            return await asyncio.wait_for(asyncio.shield(future), remaining)
+        finally:
+            running_time[0] += time.perf_counter() - stage_start
+
+    try:
+        report("headings")
+        meta_and_headings = await run_stage(functools.partial(generate_meta_and_headings, requirements, settings))
+
+        content_requirements = dict(requirements)
+        content_requirements["meta_title"] = meta_and_headings.get("meta_title", "")
+        content_requirements["meta_description"] = meta_and_headings.get("meta_description", "")
+
+        report("content")
+        content = await run_stage(functools.partial(
+            generate_content_from_headings,
+            content_requirements,
+            meta_and_headings.get("heading_structure", ""),
+            settings
+        ))
+    except Exception as e:
+        if isinstance(e, asyncio.TimeoutError):
+            error = f"Timed out after {timeout}s"
+        else:
+            error = str(e)
+        report("failed")
+        return {
+            "index": index,
+            "primary_keyword": primary_keyword,
+            "ok": False,
+            "error": error,
+            "error_type": type(e).__name__,
+            "traceback": traceback.format_exc(),
+            "elapsed": round(time.perf_counter() - start_time, 3)
+        }
+
+    report("done")
+    return {
+        "index": index,
+        "primary_keyword": primary_keyword,
+        "ok": True,
+        "meta_and_headings": meta_and_headings,
+        "content": content,
+        "elapsed": round(time.perf_counter() - start_time, 3)
+    }
+
+##############################################################################
+# BATCH
+##############################################################################
+async def generate_articles_async(requirements_list, settings, concurrency=4, timeout=None, on_progress=None, output_dir=ASYNC_OUTPUT_DIR):
+    """
+    Generates articles for many requirements dicts concurrently.
+
+    Args:
+        requirements_list (list): Requirements dicts, one per article
+        settings (dict): Settings passed to the generators (model, anthropic_api_key)
+        concurrency (int): Maximum number of API calls in flight at once
+        timeout (float): Per-job timeout in seconds of running time (None for no limit)
+        on_progress (callable): Called with a progress event dict whenever a
+            job starts a stage, finishes or fails
+        output_dir (str): Folder holding one subfolder of prompts and article per job
+
+    Returns:
+        list: Job records in the same order as requirements_list; a record
+            is returned as soon as its job finishes or times out, while an
+            abandoned API call may still be running in the background
+    """
+    if not settings.get("anthropic_api_key"):
+        raise ValueError("Claude API key must be provided to use Claude")
+
+    semaphore = asyncio.Semaphore(concurrency)
+    total = len(requirements_list)
+    jobs = []
+    # One thread per semaphore slot; the loop's default pool is capped by CPU count
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="article")
+    for index, requirements in enumerate(requirements_list):
+        # Numbered by position; the article file inside is named after the keyword
+        job_dir = os.path.join(output_dir, f"{index + 1:04d}")
+        os.makedirs(job_dir, exist_ok=True)
+        job_settings = dict(settings, output_dir=job_dir)
+        jobs.append(generate_article_async(index, requirements, job_settings, semaphore, executor, timeout, on_progress, total))
+    try:
+        return await asyncio.gather(*jobs)
+    finally:
+        # Don't wait for calls abandoned by a timeout; they finish on their own
+        executor.shutdown(wait=False)
+
+def generate_articles(requirements_list, settings, concurrency=4, timeout=None, on_progress=None, output_dir=ASYNC_OUTPUT_DIR):
+    """Synchronous wrapper around generate_articles_async for scripts."""
+    return asyncio.run(generate_articles_async(requirements_list, settings, concurrency, timeout, on_progress, output_dir))
+
+##############################################################################
+# COMMAND LINE
+##############################################################################
+def load_requirements_jsonl(path):
+    """
+    Reads requirements dicts from a JSONL file.
+
+    Accepts both the records written by batch.py (only successful ones are
+    used) and plain requirements dicts, one per line.
+    """
+    requirements_list = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if "requirements" in record and "ok" in record:
+                if record["ok"]:
+                    requirements_list.append(record["requirements"])
+            else:
+                requirements_list.append(record)
+    return requirements_list
+
+def print_progress(event):
+    """Default progress callback: one line per event on stderr."""
+    print(
+        f"[{event['index'] + 1}/{event['total']}] {event['primary_keyword']}: "
+        f"{event['stage']} ({event['elapsed']:.1f}s)",
+        file=sys.stderr
+    )
+
+def main(argv=None):
+    """Command-line entry point: python async_generation.py requirements.jsonl [-o articles.jsonl]"""
+    parser = argparse.ArgumentParser(description="Generate articles for many CORA requirements concurrently.")
+    parser.add_argument("requirements", help="JSONL of requirements (e.g. the output of batch.py)")
+    parser.add_argument("-o", "--output", default="articles.jsonl", help="JSONL file for the generated articles")
+    parser.add_argument("-c", "--concurrency", type=int, default=4, help="Maximum concurrent API calls")
+    parser.add_argument("--timeout", type=float, default=None, help="Per-article timeout in seconds")
+    parser.add_argument("--output-dir", default=ASYNC_OUTPUT_DIR, help="Folder for each article's prompts and markdown")
+    args = parser.parse_args(argv)
+
+    settings = {"model": "claude", "anthropic_api_key": os.environ.get("CLAUDE_API_KEY", "")}
+    requirements_list = load_requirements_jsonl(args.requirements)
+    records = generate_articles(requirements_list, settings, args.concurrency, args.timeout, print_progress, args.output_dir)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    failed = sum(1 for record in records if not record["ok"])
+    print(f"Generated {len(records) - failed} article(s), {failed} failed", file=sys.stderr)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+import os
+import sys
+import json
+import argparse
+import contextlib
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+from main import parse_cora_report_cached
+
+# File types accepted by the Streamlit uploader
+WORKBOOK_EXTENSIONS = (".xlsx", ".xls")
+
+##############################################################################
+# COLLECT WORKBOOKS
+##############################################################################
+def collect_workbooks(paths):
+    """
+    Expands a list of files and directories into the CORA workbooks to parse.
+
+    Directories are searched recursively. Excel lock files (~$report.xlsx)
+    are skipped.
+
+    Args:
+        paths (list): File and/or directory paths
+
+    Returns:
+        list: Workbook paths, sorted within each directory
+    """
+    workbooks = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.lower().endswith(WORKBOOK_EXTENSIONS) and not name.startswith("~$"):
+                        workbooks.append(os.path.join(root, name))
+        else:
+            workbooks.append(path)
+    return workbooks
+
+##############################################################################
+# PARSE ONE WORKBOOK (WORKER)
+##############################################################################
+def parse_workbook_record(file_path):
+    """
+    Parses a single workbook into a JSON-serializable batch record.
+
+    Errors are captured in the record instead of being replaced by the
+    placeholder requirements parse_cora_report falls back to.
+
+    Args:
+        file_path (str): Path to the CORA workbook
+
+    Returns:
+        dict: {"file", "ok", "requirements"} on success or
+              {"file", "ok", "error", "error_type", "traceback"} on failure
+    """
+    # Keep the parser's progress output off stdout, which may carry the JSONL
+    with contextlib.redirect_stdout(sys.stderr):
+        try:
+            with open(file_path, "rb") as f:
+                file_bytes = f.read()
+            requirements = parse_cora_report_cached(file_bytes, strict=True)
+            return {"file": file_path, "ok": True, "requirements": requirements}
+        except Exception as e:
+            return {
+                "file": file_path,
+                "ok": False,
+                "error": str(e),
+                "error_type": type(e).__name__,
+                "traceback": traceback.format_exc()
+            }
+
+##############################################################################
+# BATCH PARSE
+##############################################################################
+def parse_cora_batch(paths, max_workers=None):
+    """
+    Parses many CORA workbooks in parallel across a process pool.
+
+    Args:
+        paths (list): Workbook files and/or directories containing them
+        max_workers (int): Number of worker processes (defaults to the CPU count)
+
+    Yields:
+        dict: One record per workbook (see parse_workbook_record), in input order
+    """
+    workbooks = collect_workbooks(paths)
+    if not workbooks:
+        return
+
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers == 1 or len(workbooks) == 1:
+        for file_path in workbooks:
+            yield parse_workbook_record(file_path)
+        return
+
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(workbooks))) as executor:
+        for record in executor.map(parse_workbook_record, workbooks):
+            yield record
+
+def write_jsonl(records, output):
+    """
+    Writes batch records as JSON Lines.
+
+    Args:
+        records (iterable): Records from parse_cora_batch
+        output: Writable text file object
+
+    Returns:
+        tuple: (number of successful records, number of failed records)
+    """
+    succeeded = 0
+    failed = 0
+    for record in records:
+        output.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        output.flush()
+        if record["ok"]:
+            succeeded += 1
+        else:
+            failed += 1
+            print(f"❌ {record['file']}: {record['error_type']}: {record['error']}", file=sys.stderr)
+    return succeeded, failed
+
+##############################################################################
+# COMMAND LINE
+##############################################################################
+def main(argv=None):
+    """Command-line entry point: python batch.py REPORTS... [-o out.jsonl] [-j N]"""
+    parser = argparse.ArgumentParser(description="Parse CORA reports in bulk and emit requirements as JSONL.")
+    parser.add_argument("paths", nargs="+", help="CORA workbooks or directories containing them")
+    parser.add_argument("-o", "--output", help="JSONL output file (defaults to stdout)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Number of worker processes (defaults to CPU count)")
+    args = parser.parse_args(argv)
+
+    records = parse_cora_batch(args.paths, max_workers=args.jobs)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            succeeded, failed = write_jsonl(records, f)
+    else:
+        succeeded, failed = write_jsonl(records, sys.stdout)
+
+    print(f"Parsed {succeeded} report(s), {failed} failed", file=sys.stderr)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,319 @@
+import os
+import re
+import sys
+import json
+import time
+import logging
+import argparse
+
+import anthropic
+
+from cache import hash_json, write_json_atomic
+from main import (
+    build_heading_prompts, build_content_prompts, build_claude_request, compute_token_budgets,
+    parse_heading_response, finalize_content,
+    get_response_text, get_token_usage, response_cache
+)
+from async_generation import load_requirements_jsonl
+
+# Progress for a run is kept here (inside the output directory) so an
+# interrupted run picks up where it stopped instead of paying for a new batch
+BATCH_STATE_FILE = "batch_state.json"
+
+# Stages run in this order; the content prompts need the heading results
+BATCH_STAGES = ("headings", "content")
+
+# Seconds between status checks while a batch is processing
+DEFAULT_POLL_INTERVAL = 60
+
+##############################################################################
+# STATE
+##############################################################################
+def load_batch_state(output_dir, requirements_list):
+    """
+    Loads the state of a previous run from output_dir, or starts a new one.
+
+    Args:
+        output_dir (str): Output directory of the run
+        requirements_list (list): Requirements dicts of this run
+
+    Returns:
+        dict: {"input_hash", "batches": {stage: batch id}, "jobs": [...]}
+
+    Raises:
+        ValueError: If output_dir holds the state of a run over other requirements
+    """
+    input_hash = hash_json(requirements_list)
+    path = os.path.join(output_dir, BATCH_STATE_FILE)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        if state.get("input_hash") != input_hash:
+            raise ValueError(
+                f"{path} belongs to a run over different requirements; "
+                "use another output directory or delete the state file"
+            )
+        return state
+
+    return {
+        "input_hash": input_hash,
+        "batches": {},
+        "jobs": [
+            {"primary_keyword": requirements.get("primary_keyword", ""), "results": {}, "error": None}
+            for requirements in requirements_list
+        ]
+    }
+
+def save_batch_state(state, output_dir):
+    """Writes the run state (see cache.write_json_atomic)."""
+    write_json_atomic(os.path.join(output_dir, BATCH_STATE_FILE), state, ensure_ascii=False, indent=2)
+
+##############################################################################
+# REQUESTS
+##############################################################################
+def build_stage_request(stage, requirements, job):
+    """
+    Builds the Messages API request for one job's stage.
+
+    The prompts and token budgets are the ones the interactive generators
+    use, so batch and interactive runs share response cache entries.
+
+    Args:
+        stage (str): "headings" or "content"
+        requirements (dict): Requirements from parse_cora_report
+        job (dict): The job's state, holding the heading results for the content stage
+
+    Returns:
+        dict: Keyword arguments for messages.create
+    """
+    if stage == "headings":
+        system_prompt, cacheable_prefix, user_prompt = build_heading_prompts(requirements)
+        return build_claude_request(
+            system_prompt, user_prompt, False, cacheable_prefix, compute_token_budgets(requirements, False)
+        )
+
+    meta_and_headings = parse_heading_response(job["results"]["headings"]["text"])
+    content_requirements = dict(requirements)
+    content_requirements["meta_title"] = meta_and_headings["meta_title"]
+    content_requirements["meta_description"] = meta_and_headings["meta_description"]
+    system_prompt, cacheable_prefix, user_prompt = build_content_prompts(
+        content_requirements, meta_and_headings["heading_structure"]
+    )
+    return build_claude_request(
+        system_prompt, user_prompt, True, cacheable_prefix, compute_token_budgets(requirements, True)
+    )
+
+def pending_jobs(stage, state):
+    """Indexes of jobs that still need this stage (earlier stages done, no error)."""
+    previous_stages = BATCH_STAGES[:BATCH_STAGES.index(stage)]
+    return [
+        index for index, job in enumerate(state["jobs"])
+        if job["error"] is None
+        and stage not in job["results"]
+        and all(previous in job["results"] for previous in previous_stages)
+    ]
+
+##############################################################################
+# RUN ONE STAGE
+##############################################################################
+def wait_for_batch(client, batch_id, poll_interval):
+    """
+    Polls a message batch until it has ended.
+
+    Returns:
+        MessageBatch: The ended batch
+    """
+    while True:
+        batch = client.messages.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        print(
+            f"Batch {batch_id}: {batch.processing_status} "
+            f"({counts.succeeded} succeeded, {counts.errored} errored, {counts.processing} processing)",
+            file=sys.stderr
+        )
+        if batch.processing_status == "ended":
+            return batch
+        time.sleep(poll_interval)
+
+def run_batch_stage(client, stage, requirements_list, state, output_dir, poll_interval=DEFAULT_POLL_INTERVAL, use_cache=True):
+    """
+    Runs one stage for every pending job as a single message batch.
+
+    Requests already in the response cache are answered from it and left
+    out of the batch. The batch id is saved before polling starts, so a
+    restarted run polls the same batch rather than submitting a new one.
+
+    Args:
+        client (anthropic.Anthropic): Client whose messages.batches endpoints are used
+        stage (str): "headings" or "content"
+        requirements_list (list): Requirements dicts, one per job
+        state (dict): Run state from load_batch_state (updated in place and saved)
+        output_dir (str): Output directory holding the state file
+        poll_interval (float): Seconds between status checks
+        use_cache (bool): Answer requests from the response cache when possible
+    """
+    batch_id = state["batches"].get(stage)
+
+    if batch_id is None:
+        batch_requests = []
+        for index in pending_jobs(stage, state):
+            job = state["jobs"][index]
+            request = build_stage_request(stage, requirements_list[index], job)
+            cached = response_cache.get(hash_json(request)) if use_cache else None
+            if cached is not None:
+                job["results"][stage] = {"text": cached["text"], "usage": dict(cached["usage"], response_cache_hit=True)}
+            else:
+                batch_requests.append({"custom_id": f"{stage}-{index}", "params": request})
+
+        if not batch_requests:
+            save_batch_state(state, output_dir)
+            return
+
+        batch = client.messages.batches.create(requests=batch_requests)
+        batch_id = batch.id
+        state["batches"][stage] = batch_id
+        save_batch_state(state, output_dir)
+        print(f"Submitted {stage} batch {batch_id} with {len(batch_requests)} request(s)", file=sys.stderr)
+
+    wait_for_batch(client, batch_id, poll_interval)
+
+    for entry in client.messages.batches.results(batch_id):
+        index = int(entry.custom_id.rsplit("-", 1)[1])
+        job = state["jobs"][index]
+        result = entry.result
+        if result.type == "succeeded" and getattr(result.message, "stop_reason", None) == "max_tokens":
+            # Batch requests cannot be continued like interactive ones; a
+            # cut-off answer is never cached or written out as an article
+            job["error"] = f"{stage}: response truncated at max_tokens"
+            job["truncated"] = True
+            logging.warning(f"Job {index} ({job['primary_keyword']}): {stage} response truncated at max_tokens")
+        elif result.type == "succeeded":
+            text = get_response_text(result.message)
+            usage = dict(get_token_usage(result.message), batch=True)
+            job["results"][stage] = {"text": text, "usage": usage}
+            if text:
+                try:
+                    request = build_stage_request(stage, requirements_list[index], job)
+                    response_cache.set(hash_json(request), {"text": text, "usage": usage})
+                except (OSError, TypeError, ValueError) as e:
+                    logging.warning(f"Could not cache Claude response: {e}")
+        elif result.type == "errored":
+            job["error"] = f"{stage}: {result.error.error.message}"
+        else:
+            # "canceled" or "expired"
+            job["error"] = f"{stage}: request {result.type}"
+    save_batch_state(state, output_dir)
+
+##############################################################################
+# OUTPUT
+##############################################################################
+def article_slug(primary_keyword):
+    """Returns a filesystem-safe name for a keyword's output files."""
+    return re.sub(r"[^a-z0-9]+", "_", primary_keyword.lower()).strip("_") or "article"
+
+def write_article(job, index, output_dir):
+    """
+    Post-processes a finished job and writes its markdown and HTML files.
+
+    Returns:
+        dict: Article record in the format written by async_generation.py
+    """
+    headings = job["results"]["headings"]
+    content = job["results"]["content"]
+    meta_and_headings = dict(parse_heading_response(headings["text"]), token_usage=headings["usage"])
+
+    base_name = os.path.join(output_dir, f"seo_content_{article_slug(job['primary_keyword'])}_{index}")
+    article = finalize_content(content["text"], f"{base_name}.md")
+    with open(f"{base_name}.html", "w", encoding="utf-8") as f:
+        f.write(article["html"])
+    article["token_usage"] = content["usage"]
+
+    return {
+        "index": index,
+        "primary_keyword": job["primary_keyword"],
+        "ok": True,
+        "meta_and_headings": meta_and_headings,
+        "content": article
+    }
+
+##############################################################################
+# FULL RUN
+##############################################################################
+def run_batch_generation(requirements_list, output_dir, client, poll_interval=DEFAULT_POLL_INTERVAL, use_cache=True):
+    """
+    Generates articles through the Message Batches API: one batch for the
+    heading stage, then one for the content stage.
+
+    Batches cost half as much as interactive calls but may take up to a day.
+    Every step is recorded in output_dir, so running the same command again
+    after a crash or interruption resumes the run.
+
+    Args:
+        requirements_list (list): Requirements dicts, one per article
+        output_dir (str): Directory for the articles, articles.jsonl and the state file
+        client (anthropic.Anthropic): Client to send the batches with
+        poll_interval (float): Seconds between status checks
+        use_cache (bool): Answer requests from the response cache when possible
+
+    Returns:
+        list: One record per requirements dict, in input order
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    state = load_batch_state(output_dir, requirements_list)
+
+    for stage in BATCH_STAGES:
+        run_batch_stage(client, stage, requirements_list, state, output_dir, poll_interval, use_cache)
+
+    records = []
+    for index, job in enumerate(state["jobs"]):
+        if job["error"] is not None:
+            records.append({
+                "index": index,
+                "primary_keyword": job["primary_keyword"],
+                "ok": False,
+                "error": job["error"],
+                "truncated": job.get("truncated", False)
+            })
+            continue
+        records.append(write_article(job, index, output_dir))
+
+    with open(os.path.join(output_dir, "articles.jsonl"), "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return records
+
+##############################################################################
+# COMMAND LINE
+##############################################################################
+def main(argv=None):
+    """Command-line entry point: python batch_generation.py requirements.jsonl [-o batch_output]"""
+    parser = argparse.ArgumentParser(description="Generate articles for many CORA requirements with the Message Batches API.")
+    parser.add_argument("requirements", help="JSONL of requirements (e.g. the output of batch.py)")
+    parser.add_argument("-o", "--output-dir", default="batch_output", help="Directory for the articles and the resumable run state")
+    parser.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL, help="Seconds between batch status checks")
+    parser.add_argument("--no-cache", action="store_true", help="Send every request even if a cached response exists")
+    parser.add_argument("--base-url", default=None, help="Alternative API base URL (e.g. a local stub of the batch endpoints)")
+    args = parser.parse_args(argv)
+
+    api_key = os.environ.get("CLAUDE_API_KEY", "")
+    if not api_key:
+        print("CLAUDE_API_KEY must be set", file=sys.stderr)
+        return 2
+    # A dedicated client with the SDK's retries on: batch calls are few and
+    # cheap, so they do not go through the interactive rate-limit scheduler
+    client = anthropic.Anthropic(api_key=api_key, base_url=args.base_url)
+
+    requirements_list = load_requirements_jsonl(args.requirements)
+    records = run_batch_generation(requirements_list, args.output_dir, client, args.poll_interval, not args.no_cache)
+
+    failed = sum(1 for record in records if not record["ok"])
+    truncated = sum(1 for record in records if record.get("truncated"))
+    print(
+        f"Generated {len(records) - failed} article(s), {failed} failed"
+        + (f" ({truncated} truncated at max_tokens)" if truncated else ""),
+        file=sys.stderr
+    )
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
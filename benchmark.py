@@ -0,0 +1,475 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import statistics
+import tempfile
+import tracemalloc
+import contextlib
+from datetime import datetime
+
+import openpyxl
+
+import main
+import analysis
+import document
+
+##############################################################################
+# SYNTHETIC CORA WORKBOOKS
+##############################################################################
+TUNING_CODES = {
+    "CP492": 1800,   # Word count
+    "CPXR003": 22,   # Number of heading tags
+    "CPXR005": 6,    # H2 tags
+    "CPXR006": 12,   # H3 tags
+    "CPXR007": 2,    # H4 tags
+    "CPXR008": 0,    # H5 tags
+    "CPXR009": 0,    # H6 tags
+    "CP480": 60,     # Meta title length
+    "CP380": 155,    # Meta description length
+}
+
+def generate_cora_workbook(path, lsi_rows=1000, entity_rows=200, tuning_rows=500, tuning_columns=40, seed=0):
+    """
+    Writes a synthetic CORA report with the sheets parse_cora_report reads.
+
+    The layout mirrors real CORA exports: variations in Roadmap!A2 and a
+    "Phase 1: Title & Headings" section, the primary keyword in Basic
+    Tunings!B1 with factor codes in column B and values in column E, LSI
+    keywords from row 7 (average in B, target in G) and entities from row 4.
+    Extra competitor columns make the tuning and LSI sheets as wide as
+    tuning_columns.
+
+    Args:
+        path (str): Where to save the .xlsx file
+        lsi_rows (int): Number of LSI keyword rows
+        entity_rows (int): Number of entity rows
+        tuning_rows (int): Number of factor rows in "Basic Tunings"
+        tuning_columns (int): Total column count of the wide sheets
+        seed (int): Random seed, so the same arguments give the same workbook
+
+    Returns:
+        str: The path written
+    """
+    rng = random.Random(seed)
+    wb = openpyxl.Workbook(write_only=True)
+    competitor_columns = max(tuning_columns - 7, 0)
+
+    roadmap = wb.create_sheet("Roadmap")
+    roadmap.append(["Roadmap"])
+    roadmap.append(['benchmark widgets, "cheap benchmark widgets", benchmark widget reviews'])
+    roadmap.append([])
+    roadmap.append(["Phase 1: Title & Headings"])
+    roadmap.append(["Search Terms in Title", "Use at least 1"])
+    roadmap.append(["Search Terms in H1", "Use at least 1"])
+    roadmap.append(["Search Terms in H2-H6", "Use 4 times"])
+    roadmap.append(["Phase 2: Content"])
+    roadmap.append(["Word Count", "Use 1800 words"])
+
+    tunings = wb.create_sheet("Basic Tunings")
+    tunings.append([None, "benchmark widgets"])
+    # Spread the codes we read evenly through the factor rows
+    tuning_rows = max(tuning_rows, len(TUNING_CODES))
+    step = tuning_rows // len(TUNING_CODES)
+    code_rows = {index * step: code for index, code in enumerate(TUNING_CODES.items())}
+    for row in range(tuning_rows):
+        if row in code_rows:
+            code, value = code_rows[row]
+        else:
+            code, value = f"CPF{row:05d}", round(rng.random() * 100, 2)
+        tunings.append(
+            [f"Factor {row}", code, "Description", "Goal", value, None, None]
+            + [round(rng.random() * 100, 2) for _ in range(competitor_columns)]
+        )
+
+    lsi = wb.create_sheet("LSI Keywords")
+    for _ in range(5):
+        lsi.append([])
+    lsi.append(["Keyword", "Average", "C", "D", "E", "F", "Target"])
+    for row in range(lsi_rows):
+        lsi.append(
+            [f"lsi term {row}", round(rng.random() * 3, 2), None, None, None, None, round(rng.random() * 5, 2)]
+            + [rng.randint(0, 9) for _ in range(competitor_columns)]
+        )
+
+    entities = wb.create_sheet("Entities")
+    entities.append([])
+    entities.append([])
+    entities.append(["Entity"])
+    for row in range(entity_rows):
+        entities.append([f"Entity {row}"])
+
+    wb.save(path)
+    return path
+
+##############################################################################
+# SYNTHETIC ARTICLES
+##############################################################################
+FILLER_WORDS = (
+    "the a of and to in for with on that is are be can your this more how it "
+    "quality design material price buyer option feature guide choose compare "
+    "durable simple modern practical reliable popular useful everyday value"
+).split()
+
+def generate_requirements(term_count, seed=0):
+    """
+    Builds requirements shaped like parse_cora_report output, with
+    term_count terms split 80/20 between LSI keywords and entities.
+
+    Args:
+        term_count (int): Total number of LSI keywords and entities
+        seed (int): Random seed
+
+    Returns:
+        dict: Requirements for analyze_content
+    """
+    rng = random.Random(seed)
+    entity_count = term_count // 5
+    lsi_count = term_count - entity_count
+    return {
+        "primary_keyword": "benchmark widgets",
+        "variations": ["cheap benchmark widgets", "benchmark widget reviews", "widgets"],
+        "lsi_keywords": {f"lsi term {index}": rng.randint(1, 4) for index in range(lsi_count)},
+        "entities": [f"Entity {index}" for index in range(entity_count)],
+        "word_count": 0
+    }
+
+def generate_article(word_count, requirements, seed=0):
+    """
+    Writes a synthetic Claude response: a preamble, then a fenced markdown
+    article of about word_count words with an H1, an H2 every ~300 words,
+    H3 subsections, lists and the requirement terms spread through the text.
+
+    Args:
+        word_count (int): Approximate number of words
+        requirements (dict): Requirements whose terms are sprinkled in
+        seed (int): Random seed
+
+    Returns:
+        str: The response text, ready for extract_markdown_content
+    """
+    rng = random.Random(seed)
+    terms = [requirements["primary_keyword"]] + list(requirements["variations"])
+    terms += list(requirements["lsi_keywords"]) + list(requirements["entities"])
+
+    def sentence(length):
+        words = rng.choices(FILLER_WORDS, k=length)
+        if rng.random() < 0.6:
+            words.insert(rng.randrange(len(words)), rng.choice(terms))
+        text = " ".join(words)
+        return text[0].upper() + text[1:] + "."
+
+    lines = ["Here's the article you asked for:", "", "```markdown", f"# The Complete Guide to {requirements['primary_keyword'].title()}", ""]
+    written = 0
+    section = 0
+    while written < word_count:
+        if written >= section * 300:
+            section += 1
+            lines += [f"## Section {section}: Choosing {rng.choice(terms).title()}", ""]
+        elif rng.random() < 0.15:
+            lines += [f"### {rng.choice(terms).title()} in Practice", ""]
+        if rng.random() < 0.2:
+            items = [f"- **{rng.choice(terms).title()}**: {sentence(rng.randint(6, 12))}" for _ in range(3)]
+            lines += items + [""]
+            written += sum(len(item.split()) for item in items)
+        else:
+            paragraph = " ".join(sentence(rng.randint(8, 18)) for _ in range(rng.randint(3, 6)))
+            lines += [paragraph, ""]
+            written += len(paragraph.split())
+    lines += ["```", "", "Let me know if you need any revisions."]
+    return "\n".join(lines)
+
+##############################################################################
+# MEASUREMENT
+##############################################################################
+def measure(func, repeat=3):
+    """
+    Times func and measures its peak Python memory.
+
+    Timing runs are made without tracemalloc (which slows allocation-heavy
+    code considerably); one extra traced run measures the peak.
+
+    Args:
+        func (callable): Zero-argument function to measure
+        repeat (int): Number of timed runs
+
+    Returns:
+        dict: seconds_min, seconds_median and peak_mb, plus the last result
+    """
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "seconds_min": round(min(timings), 6),
+        "seconds_median": round(statistics.median(timings), 6),
+        "peak_mb": round(peak / (1024 * 1024), 3),
+        "result": result
+    }
+
+def environment_info():
+    """Returns the interpreter and library versions a benchmark ran under."""
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "openpyxl": openpyxl.__version__,
+        "parser_version": main.PARSER_VERSION
+    }
+
+##############################################################################
+# PARSER SUITE
+##############################################################################
+def run_parser_suite(lsi_sizes, entity_rows=200, tuning_rows=500, tuning_columns=40, repeat=3, include_full=False):
+    """
+    Benchmarks parse_cora_report over synthetic workbooks of increasing size.
+
+    Args:
+        lsi_sizes (list): LSI row counts to generate, one workbook each
+        entity_rows (int): Entity rows per workbook
+        tuning_rows (int): "Basic Tunings" rows per workbook
+        tuning_columns (int): Width of the tuning and LSI sheets
+        repeat (int): Timed runs per case
+        include_full (bool): Also measure the full (non read-only) workbook load
+
+    Returns:
+        list: One result dict per (size, reader mode)
+    """
+    modes = [True, False] if include_full else [True]
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for lsi_rows in lsi_sizes:
+            path = os.path.join(tmp_dir, f"cora_{lsi_rows}.xlsx")
+            generate_cora_workbook(path, lsi_rows, entity_rows, tuning_rows, tuning_columns)
+            for read_only in modes:
+                stats = measure(lambda: main.parse_cora_report(path, read_only=read_only, strict=True), repeat)
+                parsed = stats.pop("result")
+                stats.update({
+                    "case": f"parse_cora_report[lsi={lsi_rows},read_only={read_only}]",
+                    "lsi_rows": lsi_rows,
+                    "entity_rows": entity_rows,
+                    "tuning_rows": tuning_rows,
+                    "tuning_columns": tuning_columns,
+                    "read_only": read_only,
+                    "file_bytes": os.path.getsize(path),
+                    "lsi_keywords_parsed": len(parsed["lsi_keywords"]),
+                    "rows_per_second": round(lsi_rows / stats["seconds_median"], 1) if stats["seconds_median"] else None
+                })
+                print(f"{stats['case']}: {stats['seconds_median']:.3f}s, peak {stats['peak_mb']:.1f} MB", file=sys.stderr)
+                results.append(stats)
+    return results
+
+##############################################################################
+# ANALYSIS SUITE
+##############################################################################
+def run_analysis_suite(word_counts, term_counts, repeat=3):
+    """
+    Benchmarks the post-processing of a generated article at realistic sizes:
+    extract_markdown_content and document.parse_markdown per article size,
+    and analyze_content per article size and requirements size.
+
+    parse_markdown is timed rather than main.markdown_to_html, whose
+    document cache would turn every run after the first into a lookup.
+    analyze_content is given the parsed MarkdownDocument, as the Analysis
+    tab does, and runs cold: the compiled term matcher is dropped before
+    every call.
+
+    Args:
+        word_counts (list): Article sizes in words
+        term_counts (list): Numbers of LSI keywords plus entities
+        repeat (int): Timed runs per case
+
+    Returns:
+        list: One result dict per case
+    """
+    results = []
+
+    def record(stats, case, words, terms=None):
+        stats.pop("result")
+        stats.update({
+            "case": case,
+            "words": words,
+            "words_per_second": round(words / stats["seconds_median"], 1) if stats["seconds_median"] else None
+        })
+        if terms is not None:
+            stats["terms"] = terms
+            stats["terms_per_second"] = round(terms / stats["seconds_median"], 1) if stats["seconds_median"] else None
+        print(f"{case}: {stats['seconds_median']:.4f}s, peak {stats['peak_mb']:.1f} MB", file=sys.stderr)
+        results.append(stats)
+
+    for word_count in word_counts:
+        article_requirements = generate_requirements(max(term_counts))
+        response_text = generate_article(word_count, article_requirements)
+
+        stats = measure(lambda: main.extract_markdown_content(response_text), repeat)
+        markdown_content = stats["result"]
+        words = len(markdown_content.split())
+        record(stats, f"extract_markdown_content[words={word_count}]", words)
+
+        stats = measure(lambda: document.parse_markdown(markdown_content), repeat)
+        parsed_document = stats["result"]
+        record(stats, f"parse_markdown[words={word_count}]", words)
+
+        for term_count in term_counts:
+            requirements = generate_requirements(term_count)
+
+            def analyze():
+                analysis.compile_term_matcher.cache_clear()
+                return analysis.analyze_content(parsed_document, requirements)
+
+            terms = 1 + len(requirements["variations"]) + len(requirements["lsi_keywords"]) + len(requirements["entities"])
+            record(measure(analyze, repeat), f"analyze_content[words={word_count},terms={term_count}]", words, terms)
+    return results
+
+##############################################################################
+# MARKDOWN SUITE
+##############################################################################
+def run_markdown_suite(doc_counts, word_count=1000, workers=(1,), repeat=3):
+    """
+    Benchmarks converting many articles to HTML pages: a fresh
+    markdown.markdown call and f-string page per document (the conversion
+    before the per-thread converter) against document.render_html_pages
+    and document.parse_markdown, which reuse one converter.
+
+    Args:
+        doc_counts (list): Numbers of documents per run
+        word_count (int): Article size in words
+        workers (list): Worker process counts for render_html_pages
+        repeat (int): Timed runs per case
+
+    Returns:
+        list: One result dict per case
+    """
+    import markdown
+
+    def fresh_page(markdown_content):
+        html_content = markdown.markdown(markdown_content)
+        return f"""{document.STYLED_PAGE_HEAD}{html_content}{document.STYLED_PAGE_TAIL}"""
+
+    results = []
+    requirements = generate_requirements(50)
+    for doc_count in doc_counts:
+        contents = [
+            main.extract_markdown_content(generate_article(word_count, requirements, seed))
+            for seed in range(doc_count)
+        ]
+        cases = [("fresh_converter", lambda: [fresh_page(content) for content in contents])]
+        for worker_count in workers:
+            cases.append((
+                f"render_html_pages[workers={worker_count}]",
+                lambda worker_count=worker_count: document.render_html_pages(contents, max_workers=worker_count)
+            ))
+        cases.append(("parse_markdown", lambda: [document.parse_markdown(content) for content in contents]))
+
+        for case, func in cases:
+            stats = measure(func, repeat)
+            stats.pop("result")
+            stats.update({
+                "case": f"{case}[docs={doc_count},words={word_count}]",
+                "docs": doc_count,
+                "seconds_per_doc": stats["seconds_median"] / doc_count,
+                "docs_per_second": round(doc_count / stats["seconds_median"], 1) if stats["seconds_median"] else None
+            })
+            print(f"{stats['case']}: {stats['seconds_per_doc'] * 1000:.2f} ms/doc, peak {stats['peak_mb']:.1f} MB", file=sys.stderr)
+            results.append(stats)
+    return results
+
+##############################################################################
+# COMPARISON
+##############################################################################
+def compare_reports(baseline, current, tolerance=0.10):
+    """
+    Compares two benchmark reports case by case.
+
+    Args:
+        baseline (dict): An earlier report produced by this script
+        current (dict): The report just produced
+        tolerance (float): Allowed relative slowdown / memory growth
+
+    Returns:
+        list: Human-readable regression descriptions (empty if none)
+    """
+    regressions = []
+    baseline_cases = {r["case"]: r for r in baseline.get("results", [])}
+    for result in current.get("results", []):
+        previous = baseline_cases.get(result["case"])
+        if not previous:
+            continue
+        for metric in ("seconds_median", "peak_mb"):
+            before, after = previous.get(metric), result.get(metric)
+            if before and after and after > before * (1 + tolerance):
+                regressions.append(f"{result['case']}: {metric} {before} -> {after} (+{(after / before - 1) * 100:.0f}%)")
+    return regressions
+
+##############################################################################
+# COMMAND LINE
+##############################################################################
+def main_cli(argv=None):
+    """Command-line entry point: python benchmark.py {parser,analysis,markdown} [options]"""
+    parser = argparse.ArgumentParser(description="Benchmark the SEO content generator hot paths.")
+    parser.add_argument("-o", "--output", help="Write the JSON report to this file (defaults to stdout)")
+    parser.add_argument("--compare", help="Baseline JSON report to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed relative regression (default 0.10)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case")
+    subparsers = parser.add_subparsers(dest="suite", required=True)
+
+    parser_suite = subparsers.add_parser("parser", help="parse_cora_report on synthetic CORA workbooks")
+    parser_suite.add_argument("--lsi-rows", type=int, nargs="+", default=[100, 1000, 10000, 50000])
+    parser_suite.add_argument("--entity-rows", type=int, default=200)
+    parser_suite.add_argument("--tuning-rows", type=int, default=500)
+    parser_suite.add_argument("--tuning-columns", type=int, default=40)
+    parser_suite.add_argument("--full", action="store_true", help="Also benchmark the full (non read-only) workbook load")
+
+    analysis_suite = subparsers.add_parser("analysis", help="extract_markdown_content, parse_markdown and analyze_content on synthetic articles")
+    analysis_suite.add_argument("--words", type=int, nargs="+", default=[1000, 5000, 20000])
+    analysis_suite.add_argument("--terms", type=int, nargs="+", default=[10, 100, 500, 2000], help="LSI keyword + entity counts")
+
+    markdown_suite = subparsers.add_parser("markdown", help="Bulk markdown to HTML page conversion, fresh vs reused converter")
+    markdown_suite.add_argument("--docs", type=int, nargs="+", default=[10, 100, 1000])
+    markdown_suite.add_argument("--words", type=int, default=1000, help="Article size in words")
+    markdown_suite.add_argument("--workers", type=int, nargs="+", default=[1], help="Worker process counts for render_html_pages")
+
+    args = parser.parse_args(argv)
+
+    report = {"suite": args.suite, "environment": environment_info()}
+    # Keep progress output from the code under test off stdout, which may carry the report
+    with contextlib.redirect_stdout(sys.stderr):
+        if args.suite == "parser":
+            report["results"] = run_parser_suite(
+                args.lsi_rows, args.entity_rows, args.tuning_rows, args.tuning_columns, args.repeat, args.full
+            )
+        elif args.suite == "analysis":
+            report["results"] = run_analysis_suite(args.words, args.terms, args.repeat)
+        elif args.suite == "markdown":
+            report["results"] = run_markdown_suite(args.docs, args.words, args.workers, args.repeat)
+
+    report_json = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report_json + "\n")
+    else:
+        print(report_json)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare_reports(json.load(f), report, args.tolerance)
+        for regression in regressions:
+            print(f"⚠️ Regression: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
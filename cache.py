@@ -0,0 +1,250 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Root directory for all on-disk caches
+CACHE_DIR = ".cache"
+
+##############################################################################
+# HASHING
+##############################################################################
+def hash_bytes(data):
+    """Returns the SHA-256 hex digest of raw bytes (e.g. an uploaded file)."""
+    return hashlib.sha256(data).hexdigest()
+
+def hash_json(obj):
+    """Returns the SHA-256 hex digest of a JSON-serializable object (key order independent)."""
+    return hash_bytes(json.dumps(obj, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+
+##############################################################################
+# ATOMIC WRITES
+##############################################################################
+def write_json_atomic(path, obj, **dump_kwargs):
+    """
+    Writes obj as JSON to path through a temporary file and os.replace, so
+    concurrent readers and a crash mid-write never see a partial file.
+
+    Args:
+        path (str): Destination file
+        obj: JSON-serializable value
+        **dump_kwargs: Passed on to json.dump (e.g. ensure_ascii, indent)
+    """
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(obj, f, **dump_kwargs)
+    os.replace(tmp_path, path)
+
+##############################################################################
+# DISK CACHE
+##############################################################################
+class DiskCache:
+    """
+    A small persistent key/value cache storing one JSON file per entry.
+
+    Entries are evicted least-recently-used first once the directory grows
+    past max_bytes or max_entries. Every entry is stamped with the cache's
+    version tag, and entries written under another version are treated as
+    misses, so bumping the version invalidates everything stored before.
+    Entries older than ttl seconds are misses as well.
+    """
+
+    def __init__(self, directory, version="1", max_bytes=50 * 1024 * 1024, max_entries=None, ttl=None):
+        """
+        Args:
+            directory (str): Directory holding the cache files
+            version (str): Version tag stored with (and required of) every entry
+            max_bytes (int): Upper bound on the total size of the cache files
+            max_entries (int): Optional upper bound on the number of entries
+            ttl (float): Optional lifetime of an entry in seconds
+        """
+        self.directory = directory
+        self.version = str(version)
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        """
+        Looks up a cached value.
+
+        Args:
+            key (str): Cache key (a hex digest)
+
+        Returns:
+            The stored value, or None on a miss, a version mismatch or an expired entry
+        """
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if entry.get("version") != self.version:
+            self.delete(key)
+            return None
+        if self.ttl is not None and time.time() - entry.get("created", 0) > self.ttl:
+            self.delete(key)
+            return None
+
+        # Refresh the access time so eviction is least-recently-used
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return entry.get("value")
+
+    def set(self, key, value):
+        """Stores a JSON-serializable value under key, evicting old entries if needed."""
+        os.makedirs(self.directory, exist_ok=True)
+        entry = {"version": self.version, "created": time.time(), "value": value}
+        write_json_atomic(self._path(key), entry)
+        self._evict()
+
+    def delete(self, key):
+        """Removes an entry if it exists."""
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def clear(self):
+        """Removes every entry in the cache directory."""
+        for path, _, _ in self._entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _entries(self):
+        """Returns (path, mtime, size) for every entry, oldest first."""
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return entries
+        for name in names:
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, stat.st_mtime, stat.st_size))
+        entries.sort(key=lambda entry: entry[1])
+        return entries
+
+    def _evict(self):
+        """Drops least-recently-used entries until the size limits are met."""
+        entries = self._entries()
+        total_bytes = sum(size for _, _, size in entries)
+        while entries and (
+            (self.max_bytes is not None and total_bytes > self.max_bytes) or
+            (self.max_entries is not None and len(entries) > self.max_entries)
+        ):
+            path, _, size = entries.pop(0)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total_bytes -= size
+
+##############################################################################
+# MEMORY CACHE
+##############################################################################
+class MemoryCache:
+    """A thread-safe in-process LRU cache with an optional TTL."""
+
+    def __init__(self, max_entries=128, ttl=None):
+        """
+        Args:
+            max_entries (int): Number of entries kept before evicting the oldest
+            ttl (float): Optional lifetime of an entry in seconds
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Returns the stored value, or None on a miss or an expired entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            created, value = entry
+            if self.ttl is not None and time.time() - created > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Stores a value, evicting the least-recently-used entries past max_entries."""
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        """Removes an entry if it exists."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Removes every entry."""
+        with self._lock:
+            self._entries.clear()
+
+##############################################################################
+# TIERED CACHE
+##############################################################################
+class TieredCache:
+    """
+    A memory cache in front of a disk cache.
+
+    Reads try memory first and promote disk hits into memory; writes go to
+    both tiers.
+    """
+
+    def __init__(self, memory, disk):
+        """
+        Args:
+            memory (MemoryCache): The fast, per-process tier
+            disk (DiskCache): The persistent tier
+        """
+        self.memory = memory
+        self.disk = disk
+
+    def get(self, key):
+        """Returns the stored value from the fastest tier that has it, or None."""
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+        value = self.disk.get(key)
+        if value is not None:
+            self.memory.set(key, value)
+        return value
+
+    def set(self, key, value):
+        """Stores a value in both tiers."""
+        self.memory.set(key, value)
+        self.disk.set(key, value)
+
+    def delete(self, key):
+        """Removes an entry from both tiers."""
+        self.memory.delete(key)
+        self.disk.delete(key)
+
+    def clear(self):
+        """Removes every entry from both tiers."""
+        self.memory.clear()
+        self.disk.clear()
@@ -0,0 +1,252 @@
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from cache import MemoryCache, hash_bytes
+
+# Parsed documents by markdown hash. Generation, the preview, the Analysis
+# tab and the ZIP export all ask for the same article version
+document_cache = MemoryCache(max_entries=32)
+
+HEADING_TAGS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+# Python-Markdown's placeholder for raw HTML kept out of the element tree
+RAW_HTML_PLACEHOLDER_PATTERN = re.compile(r"\x02wzxhzdk:(\d+)\x03")
+TAG_PATTERN = re.compile(r"<[^>]+>")
+
+# Each thread's configured markdown.Markdown and its TreeCapture; a
+# Markdown instance holds per-conversion state, so threads never share one
+converter_local = threading.local()
+
+##############################################################################
+# HTML PAGE
+##############################################################################
+# The styled page saved and exported with each article, split once around
+# the body so wrapping is a concatenation rather than a format call
+STYLED_PAGE_HEAD, STYLED_PAGE_TAIL = """
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <title>Generated Content</title>
+            <style>
+                body { font-family: Arial, sans-serif; line-height: 1.6; max-width: 800px; margin: 0 auto; padding: 20px; }
+                h1 { color: #333; }
+                h2 { color: #444; border-bottom: 1px solid #eee; padding-bottom: 10px; }
+                h3 { color: #555; }
+                code { background-color: #f5f5f5; padding: 2px 4px; border-radius: 4px; }
+                pre { background-color: #f5f5f5; padding: 10px; border-radius: 4px; overflow-x: auto; }
+                blockquote { border-left: 4px solid #ddd; padding-left: 10px; color: #666; }
+                a { color: #0366d6; text-decoration: none; }
+                a:hover { text-decoration: underline; }
+            </style>
+        </head>
+        <body>
+            {body}
+        </body>
+        </html>
+        """.split("{body}")
+# The page used when the markdown library is not installed: the raw markdown in a <pre>
+PLAIN_PAGE_HEAD, PLAIN_PAGE_TAIL = """
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <title>Generated Content</title>
+            <style>
+                body { font-family: Arial, sans-serif; line-height: 1.6; max-width: 800px; margin: 0 auto; padding: 20px; }
+            </style>
+        </head>
+        <body>
+            <pre>{body}</pre>
+        </body>
+        </html>
+        """.split("{body}")
+
+def wrap_html_page(body_html):
+    """Wraps converted markdown in the styled HTML page saved and exported with each article."""
+    return STYLED_PAGE_HEAD + body_html + STYLED_PAGE_TAIL
+
+def plain_html_page(markdown_content):
+    """The page used when the markdown library is not installed: the raw markdown in a <pre>."""
+    return PLAIN_PAGE_HEAD + markdown_content + PLAIN_PAGE_TAIL
+
+##############################################################################
+# DOCUMENT
+##############################################################################
+class TreeCapture:
+    """
+    Treeprocessor that keeps the finished element tree of a conversion.
+
+    Registered after Python-Markdown's own treeprocessors, so the tree it
+    sees is exactly the one serialized to HTML.
+    """
+
+    def __init__(self):
+        self.root = None
+
+    def run(self, root):
+        self.root = root
+
+class MarkdownDocument:
+    """
+    One parsed version of an article, shared by everything that reads it.
+
+    The markdown is parsed once; the HTML page, the heading list and
+    counts, the outline and the text segments analysis tokenizes are all
+    taken from that parse. Documents are cached and shared (see
+    get_document), so treat them as read-only.
+    """
+
+    def __init__(self, markdown_content, body_html, tree=None, raw_html_blocks=(), is_block_level=None):
+        """
+        Args:
+            markdown_content (str): The article markdown
+            body_html (str): The converted HTML fragment
+            tree (Element): Python-Markdown's element tree, None without the markdown library
+            raw_html_blocks (list): Raw HTML the tree refers to by placeholder
+            is_block_level (callable): Tells block-level tags from inline ones
+        """
+        self.markdown = markdown_content
+        self.body_html = body_html
+        self.tree = tree
+        self.html = wrap_html_page(body_html) if tree is not None else plain_html_page(markdown_content)
+        self.raw_html_blocks = list(raw_html_blocks)
+        self.headings = []
+        # Text in document order: (heading index or None, text)
+        self.segments = []
+        if tree is not None:
+            self._walk(tree, is_block_level or (lambda tag: False))
+        self.heading_counts = {f"H{level}": 0 for level in range(1, 7)}
+        for heading in self.headings:
+            self.heading_counts[f"H{heading['level']}"] += 1
+
+    def _walk(self, element, is_block_level):
+        level = HEADING_TAGS.get(element.tag)
+        if level:
+            text = self.restore_raw_html("".join(element.itertext()))
+            self.segments.append((len(self.headings), f"\n{text}\n"))
+            self.headings.append({"level": level, "text": TAG_PATTERN.sub("", text).strip()})
+            return
+
+        block = is_block_level(element.tag)
+        if block:
+            self.segments.append((None, "\n"))
+        if element.text:
+            self.segments.append((None, self.restore_raw_html(element.text)))
+        for child in element:
+            self._walk(child, is_block_level)
+            if child.tail:
+                self.segments.append((None, self.restore_raw_html(child.tail)))
+        if block:
+            self.segments.append((None, "\n"))
+
+    def restore_raw_html(self, text):
+        """Puts the raw HTML Python-Markdown stashed back in place of its placeholders."""
+        if "\x02" not in text:
+            return text
+        return RAW_HTML_PLACEHOLDER_PATTERN.sub(
+            lambda match: self.raw_html_blocks[int(match.group(1))] if int(match.group(1)) < len(self.raw_html_blocks) else "",
+            text
+        )
+
+    def outline(self):
+        """The headings as a markdown outline (# for H1, ## for H2, ...)."""
+        return "\n".join(f"{'#' * heading['level']} {heading['text']}" for heading in self.headings)
+
+def get_converter():
+    """
+    Returns this thread's Markdown converter, built and configured on first use.
+
+    Building a converter (loading its processors and patterns) costs more
+    than converting a short article, so one is kept per thread and reset
+    after every conversion instead.
+
+    Returns:
+        tuple: (markdown.Markdown, TreeCapture), or (None, None) if the
+            markdown library is not installed
+    """
+    converter = getattr(converter_local, "converter", None)
+    if converter is None:
+        try:
+            import markdown
+        except ImportError:
+            return None, None
+        converter = markdown.Markdown()
+        capture = TreeCapture()
+        converter.treeprocessors.register(capture, "document_tree", -10)
+        converter_local.converter = converter
+        converter_local.capture = capture
+    return converter, converter_local.capture
+
+def parse_markdown(markdown_content):
+    """
+    Parses markdown into a MarkdownDocument.
+
+    Args:
+        markdown_content (str): Markdown to parse
+
+    Returns:
+        MarkdownDocument: The parsed document
+    """
+    converter, capture = get_converter()
+    if converter is None:
+        # Fallback if markdown library isn't available
+        return MarkdownDocument(markdown_content, f"<pre>{markdown_content}</pre>")
+
+    try:
+        body_html = converter.convert(markdown_content)
+        raw_html_blocks = [str(block) for block in converter.htmlStash.rawHtmlBlocks]
+        tree = capture.root
+    finally:
+        converter.reset()
+        capture.root = None
+    return MarkdownDocument(markdown_content, body_html, tree, raw_html_blocks, converter.is_block_level)
+
+def render_html_page(markdown_content):
+    """
+    Converts markdown straight to the styled HTML page, without building a
+    MarkdownDocument (for bulk exports that need nothing else).
+    """
+    converter, _ = get_converter()
+    if converter is None:
+        return plain_html_page(markdown_content)
+    try:
+        return wrap_html_page(converter.convert(markdown_content))
+    finally:
+        converter.reset()
+
+def render_html_pages(markdown_contents, max_workers=1, chunksize=16):
+    """
+    Converts many markdown documents to styled HTML pages.
+
+    Each worker (this thread, or each process of a pool) converts all of its
+    documents with one reused converter.
+
+    Args:
+        markdown_contents (iterable): Markdown documents
+        max_workers (int): Worker processes; 1 converts in this thread
+        chunksize (int): Documents sent to a worker process at a time
+
+    Returns:
+        list: HTML pages, in input order
+    """
+    if max_workers == 1:
+        return [render_html_page(markdown_content) for markdown_content in markdown_contents]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(render_html_page, markdown_contents, chunksize=chunksize))
+
+def get_document(markdown_content):
+    """
+    Returns the parsed document for a markdown version, parsing it only the
+    first time it is asked for.
+
+    Args:
+        markdown_content (str): Markdown to parse
+
+    Returns:
+        MarkdownDocument: The shared, read-only parsed document
+    """
+    key = hash_bytes(markdown_content.encode("utf-8"))
+    document = document_cache.get(key)
+    if document is None:
+        document = parse_markdown(markdown_content)
+        document_cache.set(key, document)
+    return document
@@ -7,7 +7,15 @@ from datetime import datetime
 import warnings
 import openpyxl
 import math
+import time
 import logging
+import io
+import threading
+import httpx
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from cache import CACHE_DIR, DiskCache, MemoryCache, TieredCache, hash_bytes, hash_json
+from document import get_document
+from rate_limit import CHARS_PER_TOKEN, ClaudeScheduler
 
 
 warnings.filterwarnings("ignore", category=UserWarning, module="openpyxl.styles.stylesheet")
@@ -15,6 +23,20 @@ warnings.filterwarnings("ignore", category=UserWarning, module="openpyxl.styles.
 # Define output directory
 OUTPUT_DIR = "output"
 
+# Bump whenever parse_cora_report changes what it extracts, so cached
+# requirements from older parser versions are ignored
+PARSER_VERSION = "2"
+REQUIREMENTS_CACHE_DIR = os.path.join(CACHE_DIR, "requirements")
+requirements_cache = DiskCache(REQUIREMENTS_CACHE_DIR, version=PARSER_VERSION, max_bytes=50 * 1024 * 1024)
+
+# Claude responses keyed by a hash of the full request (model, prompts, token budgets)
+RESPONSE_CACHE_DIR = os.path.join(CACHE_DIR, "responses")
+RESPONSE_CACHE_TTL = 7 * 24 * 60 * 60  # One week
+response_cache = TieredCache(
+    MemoryCache(max_entries=64, ttl=RESPONSE_CACHE_TTL),
+    DiskCache(RESPONSE_CACHE_DIR, version="1", max_bytes=200 * 1024 * 1024, ttl=RESPONSE_CACHE_TTL)
+)
+
 # Placeholder for API keys - these should be set in environment variables or Streamlit secrets
 def get_api_keys(claude_api, openai_api):
     return claude_api, openai_api
@@ -24,6 +46,40 @@ platform = "Claude"  # @param ["Claude"]
 claude_model = "claude-3-7-sonnet-latest"
 chatgpt_model = "o1-mini-2024-09-12"
 
+# Claude pricing in USD per million tokens. Prompt-cache writes cost 1.25x
+# the input price and cache reads 0.1x
+CLAUDE_PRICING = {
+    "input": 3.00,
+    "output": 15.00,
+    "cache_write": 3.75,
+    "cache_read": 0.30
+}
+
+# Message Batches requests are billed at half the interactive price
+CLAUDE_BATCH_DISCOUNT = 0.5
+
+def calculate_token_cost(token_usage):
+    """
+    Calculates the cost of a call from its token usage.
+    
+    Args:
+        token_usage (dict): Usage dict returned by call_claude_api (or a
+            batch result, marked with "batch")
+        
+    Returns:
+        tuple: (input cost, output cost, total cost) in USD
+    """
+    input_cost = (
+        token_usage.get("input_tokens", 0) * CLAUDE_PRICING["input"] +
+        token_usage.get("cache_creation_input_tokens", 0) * CLAUDE_PRICING["cache_write"] +
+        token_usage.get("cache_read_input_tokens", 0) * CLAUDE_PRICING["cache_read"]
+    ) / 1000000
+    output_cost = token_usage.get("output_tokens", 0) * CLAUDE_PRICING["output"] / 1000000
+    if token_usage.get("batch"):
+        input_cost *= CLAUDE_BATCH_DISCOUNT
+        output_cost *= CLAUDE_BATCH_DISCOUNT
+    return input_cost, output_cost, input_cost + output_cost
+
 # Heading control variables (global for simplicity; adjust as needed for Streamlit)
 h2_control = 0  # @param {"type":"number","placeholder":"0"}
 h3_control = 0  # @param {"type":"number","placeholder":"0"}
@@ -31,10 +87,70 @@ h4_control = 0  # @param {"type":"number","placeholder":"0"}
 h5_control = 0  # @param {"type":"number","placeholder":"0"}
 h6_control = 0  # @param {"type":"number","placeholder":"0"}
 
+# Shared Anthropic clients, one per API key, reused by every call, session and rerun
+# so each generation skips HTTP client construction and the TLS handshake
+CLAUDE_CONNECTION_LIMITS = httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=300)
+_claude_clients = {}
+_warmed_claude_keys = set()
+_claude_clients_lock = threading.Lock()
+
+# Organisation token-per-minute limits the scheduler paces requests to.
+# Defaults match Anthropic's tier 2 limits for Sonnet; override per deployment
+CLAUDE_INPUT_TOKENS_PER_MINUTE = int(os.environ.get("CLAUDE_INPUT_TOKENS_PER_MINUTE", 40000))
+CLAUDE_OUTPUT_TOKENS_PER_MINUTE = int(os.environ.get("CLAUDE_OUTPUT_TOKENS_PER_MINUTE", 16000))
+claude_scheduler = ClaudeScheduler(CLAUDE_INPUT_TOKENS_PER_MINUTE, CLAUDE_OUTPUT_TOKENS_PER_MINUTE)
+
+def get_claude_client(api_key):
+    """
+    Returns the process-wide Anthropic client for an API key.
+    
+    The client is created on first use and kept for the life of the process.
+    Its connection pool keeps idle connections open for several minutes
+    (the SDK default is 5 seconds), so consecutive calls reuse them. The
+    SDK's own retries are off; claude_scheduler retries instead so that
+    its token accounting sees every attempt.
+    
+    Args:
+        api_key (str): Anthropic API key
+        
+    Returns:
+        anthropic.Anthropic: The shared client
+    """
+    with _claude_clients_lock:
+        client = _claude_clients.get(api_key)
+        if client is None:
+            client = anthropic.Anthropic(
+                api_key=api_key,
+                max_retries=0,
+                http_client=anthropic.DefaultHttpxClient(limits=CLAUDE_CONNECTION_LIMITS)
+            )
+            _claude_clients[api_key] = client
+        return client
+
+def warm_up_claude_client(api_key):
+    """
+    Opens a connection for an API key in the background so the first real
+    request does not pay for connection setup. Runs once per key per process.
+    """
+    if not api_key:
+        return
+    with _claude_clients_lock:
+        if api_key in _warmed_claude_keys:
+            return
+        _warmed_claude_keys.add(api_key)
+    
+    def _warm_up():
+        try:
+            get_claude_client(api_key).models.list(limit=1)
+        except Exception as e:
+            logging.warning(f"Claude client warm-up failed: {e}")
+    
+    threading.Thread(target=_warm_up, name="claude-warm-up", daemon=True).start()
+
 # Initialize API clients
 def initialize_api_clients(claude_api, openai_api):
     if platform == "Claude":
-        client = anthropic.Anthropic(api_key=claude_api)
+        client = get_claude_client(claude_api)
         model = claude_model
     elif platform == "ChatGPT":
         client = OpenAI(api_key=openai_api)
@@ -53,11 +169,67 @@ def upload_file():
 ##############################################################################
 # PARSE CORA REPORT
 ##############################################################################
-def parse_cora_report(file_path):
-    """Parses a CORA Excel report and extracts SEO requirements."""
+def build_tuning_index(sheet):
+    """
+    Builds a lookup of CORA factor codes to their column E value in one pass.
+    
+    Column B of the "Basic Tunings" sheet holds the factor codes (CP492,
+    CPXR005, ...). A code can appear more than once, so every row's value
+    is kept and get_tuning_int picks the first or the last one.
+    B1 holds the primary keyword, so it is returned from the same pass.
+    
+    Args:
+        sheet: The "Basic Tunings" worksheet
+        
+    Returns:
+        tuple: (dict mapping code to its raw column E values in row order, raw B1 value)
+    """
+    index = {}
+    primary_keyword = None
+    for row, (code, _, _, value) in enumerate(sheet.iter_rows(min_col=2, max_col=5, values_only=True), start=1):
+        if row == 1:
+            primary_keyword = code
+        if code is not None:
+            index.setdefault(code, []).append(value)
+    return index, primary_keyword
+
+def get_tuning_int(tuning_index, code, default, last=False):
+    """
+    Returns the integer value for a tuning code, or the default if missing or not numeric.
+    
+    By default only the code's first row is read. With last=True every row
+    is read and the last numeric value wins, as the meta title and
+    description lengths (CP480, CP380) always have been.
+    """
+    values = tuning_index.get(code, [])
+    for value in values if last else values[:1]:
+        if value:
+            try:
+                default = int(value)
+            except (ValueError, TypeError):
+                pass
+    return default
+
+def parse_cora_report(file_path, read_only=True, strict=False):
+    """
+    Parses a CORA Excel report and extracts SEO requirements.
+    
+    Args:
+        file_path: Path or file-like object of the CORA .xlsx report
+        read_only (bool): Stream the sheets with openpyxl's read-only reader
+            instead of loading the full cell tree. Only columns A-G of the
+            four sheets we use are ever read, so this is much lighter on
+            wide reports with many competitor columns.
+        strict (bool): Re-raise parsing errors instead of returning the
+            placeholder "Sample Keyword" requirements
+            
+    Returns:
+        dict: The extracted requirements
+    """
+    wb = None
     try:
         # Load the Excel workbook
-        wb = openpyxl.load_workbook(file_path, data_only=True)
+        wb = openpyxl.load_workbook(file_path, read_only=read_only, data_only=True)
         
         # Initialize default values
         primary_keyword = ""
@@ -82,10 +254,9 @@ def parse_cora_report(file_path):
         # Parse "Roadmap" sheet
         if "Roadmap" in wb.sheetnames:
             roadmap_sheet = wb["Roadmap"]
-            
-            # Variations from A2
-            raw_variations = roadmap_sheet["A2"].value
-            variations = [v.strip(' "\'') for v in raw_variations.split(",") if v.strip()] if raw_variations else []
+            # Scanning rows 1-99 for the markers always counted as touching them,
+            # so the sheet is treated as at least 99 rows long
+            roadmap_max_row = max(roadmap_sheet.max_row or 0, 99)
             
             # Extract requirements from "Phase 1: Title & Headings"
             marker_start = "Phase 1: Title & Headings"
@@ -97,43 +268,45 @@ def parse_cora_report(file_path):
                 "Phase 7: Outbound Linking From the Page"
             ]
             
-            # Find start row
+            # Single pass over columns A and B: the markers are only looked for
+            # in the first 99 rows, and without an end marker the section runs
+            # up to (but not including) the last row
             start_row = None
-            for row in range(1, 100):
-                cell_a = roadmap_sheet.cell(row=row, column=1).value
-                if cell_a and marker_start in str(cell_a).strip():
-                    start_row = row + 1
+            for row, (req_desc, req_amount_text) in enumerate(
+                roadmap_sheet.iter_rows(min_col=1, max_col=2, values_only=True), start=1
+            ):
+                # Variations from A2
+                if row == 2:
+                    raw_variations = req_desc
+                    variations = [v.strip(' "\'') for v in raw_variations.split(",") if v.strip()] if raw_variations else []
+                
+                if start_row is None:
+                    # Find start row
+                    if row >= 100:
+                        break
+                    if req_desc and marker_start in str(req_desc).strip():
+                        start_row = row + 1
+                    continue
+                
+                # Stop at the end marker or the last row
+                if row >= roadmap_max_row:
                     break
-                    
-            if start_row:
-                # Find end row based on possible markers
-                end_row = None
-                for row in range(start_row, 100):
-                    cell_a = roadmap_sheet.cell(row=row, column=1).value
-                    if cell_a:
-                        cell_text = str(cell_a).strip()
-                        if any(marker in cell_text for marker in possible_end_markers):
-                            end_row = row
-                            break
-                            
-                if not end_row:
-                    end_row = roadmap_sheet.max_row
-                    
+                if row < 100 and req_desc:
+                    cell_text = str(req_desc).strip()
+                    if any(marker in cell_text for marker in possible_end_markers):
+                        break
+                
                 # Extract requirements
-                for row in range(start_row, end_row):
-                    req_desc = roadmap_sheet.cell(row=row, column=1).value
-                    req_amount_text = roadmap_sheet.cell(row=row, column=2).value
-                    
-                    if req_desc and req_amount_text:
-                        try:
-                            # Use regex to find the first number in the text
-                            match = re.search(r"(\d+)", str(req_amount_text))
-                            if match:
-                                amount = int(match.group(1))
-                                requirements[req_desc] = amount
-                        except (ValueError, TypeError):
-                            logging.warning(f"Could not parse requirement amount: {req_amount_text}")
-                            continue
+                if req_desc and req_amount_text:
+                    try:
+                        # Use regex to find the first number in the text
+                        match = re.search(r"(\d+)", str(req_amount_text))
+                        if match:
+                            amount = int(match.group(1))
+                            requirements[req_desc] = amount
+                    except (ValueError, TypeError):
+                        logging.warning(f"Could not parse requirement amount: {req_amount_text}")
+                        continue
         
         # Initialize heading variables before Basic Tunings processing
         heading_2 = 0
@@ -146,72 +319,23 @@ def parse_cora_report(file_path):
         # Initialize title and description length variables
         title_length = 60  # Default value for CP480
         desc_length = 160  # Default value for CP380
+        tuning_index = {}
         
         # Parse "Basic Tunings" sheet
         if "Basic Tunings" in wb.sheetnames:
             basic_tunings_sheet = wb["Basic Tunings"]
+            # Index every CP/CPXR code in column B once, then serve lookups from it
+            tuning_index, primary_keyword_value = build_tuning_index(basic_tunings_sheet)
             # Primary keyword from B1
-            primary_keyword = basic_tunings_sheet["B1"].value.strip() if basic_tunings_sheet["B1"].value else ""
+            primary_keyword = primary_keyword_value.strip() if primary_keyword_value else ""
             # Word count from CP492
-            for row in range(1, basic_tunings_sheet.max_row + 1):
-                if basic_tunings_sheet.cell(row=row, column=2).value == "CP492":
-                    word_count_value = basic_tunings_sheet.cell(row=row, column=5).value
-                    if word_count_value:
-                        try:
-                            word_count = int(word_count_value)
-                        except ValueError:
-                            pass
-                    break
-            # Number of H2 Tags
-            for row in range(1, basic_tunings_sheet.max_row + 1):
-                if basic_tunings_sheet.cell(row=row, column=2).value == "CPXR005":
-                    heading_2_value = basic_tunings_sheet.cell(row=row, column=5).value
-                    if heading_2_value:
-                        try:
-                            heading_2 = int(heading_2_value)
-                        except ValueError:
-                            pass
-                    break
-            # Number of H3 Tags
-            for row in range(1, basic_tunings_sheet.max_row + 1):
-                if basic_tunings_sheet.cell(row=row, column=2).value == "CPXR006":
-                    heading_3_value = basic_tunings_sheet.cell(row=row, column=5).value
-                    if heading_3_value:
-                        try:
-                            heading_3 = int(heading_3_value)
-                        except ValueError:
-                            pass
-                    break
-            # Number of H4 Tags
-            for row in range(1, basic_tunings_sheet.max_row + 1):
-                if basic_tunings_sheet.cell(row=row, column=2).value == "CPXR007":
-                    heading_4_value = basic_tunings_sheet.cell(row=row, column=5).value
-                    if heading_4_value:
-                        try:
-                            heading_4 = int(heading_4_value)
-                        except ValueError:
-                            pass
-                    break
-            # Number of H5 Tags
-            for row in range(1, basic_tunings_sheet.max_row + 1):
-                if basic_tunings_sheet.cell(row=row, column=2).value == "CPXR008":
-                    heading_5_value = basic_tunings_sheet.cell(row=row, column=5).value
-                    if heading_5_value:
-                        try:
-                            heading_5 = int(heading_5_value)
-                        except ValueError:
-                            pass
-                    break
-            # Number of H6 Tags
-            for row in range(1, basic_tunings_sheet.max_row + 1):
-                if basic_tunings_sheet.cell(row=row, column=2).value == "CPXR009":
-                    heading_6_value = basic_tunings_sheet.cell(row=row, column=5).value
-                    if heading_6_value:
-                        try:
-                            heading_6 = int(heading_6_value)
-                        except ValueError:
-                            pass
-                    break   
+            word_count = get_tuning_int(tuning_index, "CP492", word_count)
+            # Number of H2-H6 Tags
+            heading_2 = get_tuning_int(tuning_index, "CPXR005", heading_2)
+            heading_3 = get_tuning_int(tuning_index, "CPXR006", heading_3)
+            heading_4 = get_tuning_int(tuning_index, "CPXR007", heading_4)
+            heading_5 = get_tuning_int(tuning_index, "CPXR008", heading_5)
+            heading_6 = get_tuning_int(tuning_index, "CPXR009", heading_6)
             requirements["Number of H2 tags"] = heading_2
             requirements["Number of H3 tags"] = heading_3
             requirements["Number of H4 tags"] = heading_4
@@ -219,35 +343,12 @@ def parse_cora_report(file_path):
             requirements["Number of H6 tags"] = heading_6
             
             # Number of heading tags
-            for row in range(1, basic_tunings_sheet.max_row + 1):
-                if basic_tunings_sheet.cell(row=row, column=2).value == "CPXR003":
-                    total_heading_value = basic_tunings_sheet.cell(row=row, column=5).value
-                    if total_heading_value:
-                        try:
-                            total_heading = int(total_heading_value)
-                        except ValueError:
-                            pass
-                    break   
-            
+            total_heading = get_tuning_int(tuning_index, "CPXR003", total_heading)
             requirements["Number of heading tags"] = total_heading
 
             # Extract CP480 (ideal title length) and CP380 (ideal meta description length)
-            for row in range(1, basic_tunings_sheet.max_row + 1):
-                cell_value = basic_tunings_sheet.cell(row=row, column=2).value
-                if cell_value == "CP480":  # Meta title length
-                    title_length_value = basic_tunings_sheet.cell(row=row, column=5).value
-                    if title_length_value:
-                        try:
-                            title_length = int(title_length_value)
-                        except ValueError:
-                            pass
-                elif cell_value == "CP380":  # Meta description length
-                    desc_length_value = basic_tunings_sheet.cell(row=row, column=5).value
-                    if desc_length_value:
-                        try:
-                            desc_length = int(desc_length_value)
-                        except ValueError:
-                            pass
+            title_length = get_tuning_int(tuning_index, "CP480", title_length, last=True)
+            desc_length = get_tuning_int(tuning_index, "CP380", desc_length, last=True)
             
             # Store CP480 and CP380 values in requirements
             requirements["CP480"] = title_length
@@ -258,10 +359,10 @@ def parse_cora_report(file_path):
         if lsi_sheet_name:
             lsi_sheet = wb[lsi_sheet_name]
             lsi_keywords_data = []
-            for row in range(7, lsi_sheet.max_row + 1):  # Header at row 6
-                keyword = lsi_sheet.cell(row=row, column=1).value
-                avg = lsi_sheet.cell(row=row, column=2).value
-                g_value = lsi_sheet.cell(row=row, column=7).value  # Column G value
+            for row in lsi_sheet.iter_rows(min_row=7, min_col=1, max_col=7, values_only=True):  # Header at row 6
+                keyword = row[0]
+                avg = row[1]
+                g_value = row[6]  # Column G value
                 
                 if keyword and avg:
                     try:
@@ -284,8 +385,7 @@ def parse_cora_report(file_path):
         # Parse "Entities" sheet
         if "Entities" in wb.sheetnames:
             entities_sheet = wb["Entities"]
-            for row in range(4, entities_sheet.max_row + 1):  # Header at row 3
-                entity = entities_sheet.cell(row=row, column=1).value
+            for (entity,) in entities_sheet.iter_rows(min_row=4, min_col=1, max_col=1, values_only=True):  # Header at row 3
                 if entity:
                     entities.append(str(entity).strip())
         
@@ -308,15 +408,7 @@ def parse_cora_report(file_path):
         
         if "Number of Heading Tags" in requirements:
             total_headings = 1  # For H1
-            for row in range(1, basic_tunings_sheet.max_row + 1):
-                if basic_tunings_sheet.cell(row=row, column=2).value == "CPXR003":
-                    total_heading_value = basic_tunings_sheet.cell(row=row, column=5).value
-                    if total_heading_value:
-                        try:
-                            total_heading = int(total_heading_value)
-                        except ValueError:
-                            pass
-                    break   
+            total_heading = get_tuning_int(tuning_index, "CPXR003", total_heading)
             requirements["Number of Heading Tags"] = total_heading
 
                 # Compile results
@@ -336,6 +428,8 @@ def parse_cora_report(file_path):
         return results
         
     except Exception as e:
+        if strict:
+            raise
         print(f"❌ Error parsing CORA report: {str(e)}")
         import traceback
         traceback.print_exc()
@@ -350,80 +444,456 @@ def parse_cora_report(file_path):
             "heading_overrides": [],
             "debug_info": {"error": str(e)}
         }
+    finally:
+        # Read-only workbooks keep the underlying archive open until closed
+        if wb is not None:
+            wb.close()
 
-def call_claude_api(system_prompt, user_prompt, api_key, is_content_generation=False):
-    """Call the Claude API with the given prompts."""
-    client = anthropic.Anthropic(api_key=api_key)
+def parse_cora_report_cached(file_bytes, strict=False):
+    """
+    Parses a CORA report, reusing the stored result for identical uploads.
     
-    # Use different token budgets based on the type of generation
-    max_tokens = 14500 if is_content_generation else 4500
-    thinking_budget = 14000 if is_content_generation else 4000
+    Results are cached on disk keyed by a SHA-256 hash of the workbook bytes
+    and tagged with PARSER_VERSION. Failed parses are never cached.
     
-    # Print debug information
-    print(f"Calling Claude API:")
-    print(f"Mode: {'Content Generation' if is_content_generation else 'Heading Generation'}")
-    print(f"Max Tokens: {max_tokens}")
-    print(f"Thinking Budget: {thinking_budget}")
-    print(f"API Key: {api_key[:5]}...")
+    Args:
+        file_bytes (bytes): Raw contents of the uploaded .xlsx file
+        strict (bool): Re-raise parsing errors (see parse_cora_report)
+        
+    Returns:
+        dict: The extracted requirements
+    """
+    key = hash_bytes(file_bytes)
+    cached = requirements_cache.get(key)
+    if cached is not None:
+        print(f"✅ Loaded cached requirements for {cached.get('primary_keyword', '')}")
+        return cached
     
-    # Verify prompt
-    if len(user_prompt) < 50:
-        print("WARNING: User prompt seems too short, might not be valid")
+    results = parse_cora_report(io.BytesIO(file_bytes), strict=strict)
+    if "error" not in results.get("debug_info", {}):
+        try:
+            requirements_cache.set(key, results)
+        except (OSError, TypeError, ValueError) as e:
+            logging.warning(f"Could not cache parsed requirements: {e}")
+    return results
+
+##############################################################################
+# TOKEN BUDGETS
+##############################################################################
+# Output tokens per word of markdown prose (headings, bold and list markup included)
+TOKENS_PER_WORD = 1.4
+
+# Extra room for the answer on top of the estimate, so it is not cut short
+ANSWER_TOKEN_MARGIN = 1.15
+
+# The API requires at least 1024 thinking tokens
+MIN_THINKING_BUDGET = 1024
+
+# Thinking budgets: a base plus allowances for everything the model has to
+# plan around. Coefficients are tokens per heading / term / word
+HEADING_THINKING = {"base": 1024, "per_heading": 60, "per_term": 10, "max": 8000}
+CONTENT_THINKING = {"base": 2048, "per_heading": 40, "per_lsi": 15, "per_entity": 20, "per_word": 0.5, "max": 16000}
+
+# Upper bound on max_tokens for claude-3-7-sonnet
+CLAUDE_MAX_OUTPUT_TOKENS = 64000
+
+# The SDK refuses non-streaming requests that may run past 10 minutes
+# (max_tokens above 128000 * 10 / 60); larger requests are streamed
+CLAUDE_MAX_NONSTREAMING_TOKENS = 21333
+
+def count_required_headings(requirements):
+    """Returns the number of headings the article needs: the H1 plus every required H2-H6."""
+    heading_requirements = requirements.get("requirements", {})
+    return 1 + sum(int(heading_requirements.get(f"Number of H{level} tags", 0) or 0) for level in range(2, 7))
+
+def compute_token_budgets(requirements, is_content_generation=False):
+    """
+    Sizes max_tokens and the thinking budget for a call from its requirements.
+    
+    The answer budget follows the text the model must return: the word
+    count (plus the 100-word allowance the prompt gives) for an article, or
+    the meta tags and one line per heading for the outline. The thinking
+    budget grows with the number of headings, LSI keywords and entities
+    the prompt asks the model to place. max_tokens is the sum of both, so
+    thinking can no longer crowd out the answer.
     
-    response = client.messages.create(
-        model="claude-3-7-sonnet-latest",
-        max_tokens=max_tokens,
-        system=system_prompt,
-        messages=[
+    Args:
+        requirements (dict): Requirements from parse_cora_report
+        is_content_generation (bool): Size the content call rather than the heading call
+        
+    Returns:
+        dict: max_tokens, thinking_budget and the answer_tokens estimate
+    """
+    headings = count_required_headings(requirements)
+    lsi_keywords = requirements.get("lsi_keywords", {}) or {}
+    entities = requirements.get("entities", []) or []
+    
+    if is_content_generation:
+        # The content prompt lists the top lsi_limit LSI keywords and 20 entities
+        lsi_count = min(requirements.get("lsi_limit", 100), len(lsi_keywords))
+        entity_count = min(20, len(entities))
+        word_count = int(requirements.get("word_count", 1500) or 1500)
+        answer_tokens = math.ceil((word_count + 100) * TOKENS_PER_WORD * ANSWER_TOKEN_MARGIN) + headings * 12
+        thinking_budget = (
+            CONTENT_THINKING["base"] +
+            CONTENT_THINKING["per_heading"] * headings +
+            CONTENT_THINKING["per_lsi"] * lsi_count +
+            CONTENT_THINKING["per_entity"] * entity_count +
+            CONTENT_THINKING["per_word"] * word_count
+        )
+        thinking_budget = min(thinking_budget, CONTENT_THINKING["max"])
+    else:
+        # The heading prompt lists 5 variations, 10 LSI keywords and 10 entities
+        term_count = min(5, len(requirements.get("variations", []) or [])) + min(10, len(lsi_keywords)) + min(10, len(entities))
+        answer_tokens = 300 + headings * 25
+        thinking_budget = (
+            HEADING_THINKING["base"] +
+            HEADING_THINKING["per_heading"] * headings +
+            HEADING_THINKING["per_term"] * term_count
+        )
+        thinking_budget = min(thinking_budget, HEADING_THINKING["max"])
+    
+    thinking_budget = max(int(thinking_budget), MIN_THINKING_BUDGET)
+    max_tokens = min(thinking_budget + answer_tokens, CLAUDE_MAX_OUTPUT_TOKENS)
+    return {
+        "max_tokens": max_tokens,
+        "thinking_budget": thinking_budget,
+        "answer_tokens": answer_tokens
+    }
+
+def log_token_budget(request, response, content_text):
+    """
+    Prints the planned budgets next to what the call actually used, for tuning
+    compute_token_budgets. Thinking and answer tokens are estimated from their
+    text length, since the API reports only their sum.
+    
+    Returns:
+        dict: Planned and actual figures (also merged into the token usage)
+    """
+    thinking_characters = sum(
+        len(getattr(block, "thinking", "") or "") for block in response.content
+        if getattr(block, "type", None) == "thinking"
+    )
+    stats = {
+        "planned_max_tokens": request["max_tokens"],
+        "planned_thinking_budget": request.get("thinking", {}).get("budget_tokens", 0),
+        "estimated_thinking_tokens": thinking_characters // CHARS_PER_TOKEN,
+        "estimated_answer_tokens": len(content_text) // CHARS_PER_TOKEN,
+        "stop_reason": getattr(response, "stop_reason", None)
+    }
+    print(
+        f"Token budget: planned max_tokens={stats['planned_max_tokens']}, thinking={stats['planned_thinking_budget']}; "
+        f"used output={response.usage.output_tokens} (thinking ~{stats['estimated_thinking_tokens']}, "
+        f"answer ~{stats['estimated_answer_tokens']}), stop_reason={stats['stop_reason']}"
+    )
+    if stats["stop_reason"] == "max_tokens":
+        logging.warning(f"Claude response hit max_tokens ({request['max_tokens']}); asking for a continuation")
+    return stats
+
+##############################################################################
+# CLAUDE API
+##############################################################################
+def build_claude_request(system_prompt, user_prompt, is_content_generation=False, cacheable_prefix=None, token_budgets=None):
+    """
+    Builds the Messages API request call_claude_api sends.
+    
+    Args:
+        system_prompt (str): System prompt
+        user_prompt (str): User prompt
+        is_content_generation (bool): Use the larger content token budgets
+        cacheable_prefix (str): Optional stable text sent before user_prompt
+        token_budgets (dict): Budgets from compute_token_budgets. Without
+            them fixed budgets are used (14500/14000 for content, 4500/4000
+            for headings). A thinking_budget of 0 sends the request without
+            extended thinking
+        
+    Returns:
+        dict: Keyword arguments for messages.create (also the params of a batch request)
+    """
+    if token_budgets:
+        max_tokens = token_budgets["max_tokens"]
+        thinking_budget = token_budgets["thinking_budget"]
+    else:
+        # Use different token budgets based on the type of generation
+        max_tokens = 14500 if is_content_generation else 4500
+        thinking_budget = 14000 if is_content_generation else 4000
+    
+    # Mark the stable prefix (system prompt, then the per-report requirements)
+    # as cacheable so repeat runs read it from Anthropic's prompt cache
+    user_content = []
+    if cacheable_prefix:
+        user_content.append({
+            "type": "text",
+            "text": cacheable_prefix,
+            "cache_control": {"type": "ephemeral"}
+        })
+    user_content.append({
+        "type": "text",
+        "text": user_prompt
+    })
+    
+    request = {
+        "model": "claude-3-7-sonnet-latest",
+        "max_tokens": max_tokens,
+        "system": [
             {
-                "role": "user",
-                "content": [
-                    {
-                        "type": "text",
-                        "text": user_prompt
-                    }
-                ]
+                "type": "text",
+                "text": system_prompt,
+                "cache_control": {"type": "ephemeral"}
             }
         ],
-        thinking={
+        "messages": [
+            {
+                "role": "user",
+                "content": user_content
+            }
+        ]
+    }
+    if thinking_budget:
+        request["thinking"] = {
             "type": "enabled",
             "budget_tokens": thinking_budget
         }
-    )
-    # Extract content text correctly based on response structure
-    # Look for the actual content, not thinking blocks
-    content_text = ""
+    return request
+
+def get_response_text(response):
+    """Returns the answer text of a Message: its first text block, skipping thinking."""
     for content_block in response.content:
         if hasattr(content_block, 'text'):
-            content_text = content_block.text
-            break
+            return content_block.text
         elif isinstance(content_block, dict) and 'text' in content_block:
-            content_text = content_block['text']
-            break
+            return content_block['text']
+    return ""
+
+# Token counts reported for every call (and summed over multi-call results)
+TOKEN_USAGE_KEYS = ("input_tokens", "output_tokens", "cache_creation_input_tokens", "cache_read_input_tokens", "total_tokens")
+
+# Follow-up calls allowed when a response stops on max_tokens, and the
+# answer budget of each (continuations run without thinking)
+MAX_CONTINUATIONS = 3
+CONTINUATION_MAX_TOKENS = 8192
+
+def get_token_usage(response):
+    """
+    Returns the token usage dict of a Message.
     
-    # Return both the response text and token usage information
-    usage = {
+    input_tokens excludes prompt-cache reads and writes, which are billed separately.
+    """
+    cache_creation_tokens = getattr(response.usage, "cache_creation_input_tokens", 0) or 0
+    cache_read_tokens = getattr(response.usage, "cache_read_input_tokens", 0) or 0
+    return {
         "input_tokens": response.usage.input_tokens,
         "output_tokens": response.usage.output_tokens,
-        "total_tokens": response.usage.input_tokens + response.usage.output_tokens
+        "cache_creation_input_tokens": cache_creation_tokens,
+        "cache_read_input_tokens": cache_read_tokens,
+        "total_tokens": response.usage.input_tokens + cache_creation_tokens + cache_read_tokens + response.usage.output_tokens
     }
+
+def call_claude_api(system_prompt, user_prompt, api_key, is_content_generation=False, on_text=None, use_cache=True, cacheable_prefix=None, token_budgets=None):
+    """
+    Call the Claude API with the given prompts.
+    
+    Args:
+        system_prompt (str): System prompt
+        user_prompt (str): User prompt
+        api_key (str): Anthropic API key
+        is_content_generation (bool): Use the larger content token budgets
+        on_text (callable): Optional callback. When given, the response is
+            streamed and on_text(delta) is called with each piece of answer
+            text as it arrives (thinking is never passed through)
+        use_cache (bool): Serve identical requests from response_cache. Pass
+            False to force a fresh response (the new one is still cached).
+            Cache hits return the token usage of the original call with
+            "response_cache_hit" set, so cost reporting stays accurate.
+        cacheable_prefix (str): Optional text sent before user_prompt that is
+            stable across calls (e.g. the per-report requirements). It and
+            the system prompt are marked for Anthropic prompt caching.
+        token_budgets (dict): max_tokens and thinking budget from
+            compute_token_budgets (fixed budgets when omitted)
+            
+    Returns:
+        tuple: (response text, token usage dict)
+    """
+    client = get_claude_client(api_key)
+    
+    request = build_claude_request(system_prompt, user_prompt, is_content_generation, cacheable_prefix, token_budgets)
+    
+    # Print debug information
+    print(f"Calling Claude API:")
+    print(f"Mode: {'Content Generation' if is_content_generation else 'Heading Generation'}")
+    print(f"Max Tokens: {request['max_tokens']}")
+    print(f"Thinking Budget: {request.get('thinking', {}).get('budget_tokens', 0)}")
+    print(f"API Key: {api_key[:5]}...")
+    
+    # Verify prompt
+    if len(user_prompt) < 50:
+        print("WARNING: User prompt seems too short, might not be valid")
+    
+    cache_key = hash_json(request)
+    if use_cache:
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            print("Response cache hit, skipping API call")
+            if on_text is not None:
+                on_text(cached["text"])
+            return cached["text"], dict(cached["usage"], response_cache_hit=True)
+    
+    # Sent through the scheduler, which paces requests to the token-per-minute
+    # limits and retries rate-limit and overload errors
+    time_to_first_token = None
+    if on_text is None and request["max_tokens"] <= CLAUDE_MAX_NONSTREAMING_TOKENS:
+        response = claude_scheduler.call(lambda: client.messages.create(**request), request)
+    else:
+        # Large budgets are streamed even without a callback (see CLAUDE_MAX_NONSTREAMING_TOKENS)
+        streamed = []
+        stream_stats = {}
+        
+        def forward_text(delta):
+            streamed.append(delta)
+            if on_text is not None:
+                on_text(delta)
+        
+        def send_streaming():
+            response, stream_stats["time_to_first_token"] = stream_claude_response(client, request, forward_text)
+            return response
+        
+        # A stream that already produced text cannot be retried without
+        # duplicating it in the caller's output
+        response = claude_scheduler.call(send_streaming, request, should_retry=lambda: on_text is None or not streamed)
+        time_to_first_token = stream_stats.get("time_to_first_token")
+    # Return both the response text and token usage information
+    content_text = get_response_text(response)
+    usage = get_token_usage(response)
+    usage.update(log_token_budget(request, response, content_text))
+    stop_reason = getattr(response, "stop_reason", None)
+    if stop_reason == "max_tokens":
+        content_text, continuation_usage, stop_reason = continue_truncated_response(client, request, content_text, on_text)
+        for key in TOKEN_USAGE_KEYS:
+            usage[key] += continuation_usage[key]
+        usage["continuations"] = continuation_usage["continuations"]
+    # A cut-off article is returned this once but never served from the cache
+    if content_text and stop_reason != "max_tokens":
+        try:
+            response_cache.set(cache_key, {"text": content_text, "usage": dict(usage)})
+        except (OSError, TypeError, ValueError) as e:
+            logging.warning(f"Could not cache Claude response: {e}")
+    if time_to_first_token is not None:
+        usage["time_to_first_token"] = time_to_first_token
     return content_text, usage
 
+def continue_truncated_response(client, request, text, on_text=None):
+    """
+    Finishes a response that stopped on max_tokens.
+    
+    The truncated answer is sent back as the start of the assistant turn,
+    so Claude carries on from the exact cut point. Thinking is switched off
+    for these calls: the plan is already reflected in the text so far, and
+    the whole max_tokens goes to the answer. Up to MAX_CONTINUATIONS
+    follow-ups are made.
+    
+    Args:
+        client (anthropic.Anthropic): Client to send the requests with
+        request (dict): The original request
+        text (str): Answer text received so far
+        on_text (callable): Optional callback receiving the continuation text as it streams
+        
+    Returns:
+        tuple: (text, usage of the continuation calls with a "continuations"
+            count, stop_reason of the last call: still "max_tokens" if the
+            text is truncated after MAX_CONTINUATIONS follow-ups)
+    """
+    usage = {key: 0 for key in TOKEN_USAGE_KEYS}
+    continuations = 0
+    stop_reason = "max_tokens"
+    
+    while stop_reason == "max_tokens" and continuations < MAX_CONTINUATIONS:
+        # The API rejects a final assistant turn that ends in whitespace;
+        # the continuation supplies whatever whitespace comes next
+        text = text.rstrip()
+        messages = list(request["messages"])
+        if text:
+            messages.append({"role": "assistant", "content": text})
+        continuation_request = {
+            "model": request["model"],
+            "max_tokens": CONTINUATION_MAX_TOKENS,
+            "system": request["system"],
+            "messages": messages
+        }
+        
+        print(f"Continuing truncated response ({len(text)} characters so far)")
+        if on_text is None:
+            response = claude_scheduler.call(lambda: client.messages.create(**continuation_request), continuation_request)
+        else:
+            streamed = []
+            
+            def forward_text(delta):
+                streamed.append(delta)
+                on_text(delta)
+            
+            response = claude_scheduler.call(
+                lambda: stream_claude_response(client, continuation_request, forward_text)[0],
+                continuation_request,
+                should_retry=lambda: not streamed
+            )
+        
+        text += get_response_text(response)
+        for key, value in get_token_usage(response).items():
+            usage[key] += value
+        continuations += 1
+        stop_reason = getattr(response, "stop_reason", None)
+    
+    if stop_reason == "max_tokens":
+        logging.warning(f"Claude response still truncated after {continuations} continuation(s)")
+    usage["continuations"] = continuations
+    return text, usage, stop_reason
+
+def stream_claude_response(client, request, on_text):
+    """
+    Streams a Messages API request, passing answer text deltas to on_text.
+    
+    Only deltas of the first text block are forwarded, matching the
+    non-streaming path which returns the first text block and skips thinking.
+    
+    Args:
+        client (anthropic.Anthropic): Client to send the request with
+        request (dict): Keyword arguments for messages.create
+        on_text (callable): Called with each text delta
+        
+    Returns:
+        tuple: (final Message, seconds until the first answer text arrived or None)
+    """
+    start_time = time.perf_counter()
+    time_to_first_token = None
+    text_block_index = None
+    
+    with client.messages.stream(**request) as stream:
+        for event in stream:
+            if event.type == "content_block_start":
+                if event.content_block.type == "text" and text_block_index is None:
+                    text_block_index = event.index
+            elif event.type == "content_block_delta":
+                if event.index == text_block_index and event.delta.type == "text_delta":
+                    if time_to_first_token is None:
+                        time_to_first_token = time.perf_counter() - start_time
+                        print(f"Time to first token: {time_to_first_token:.2f}s")
+                    on_text(event.delta.text)
+        response = stream.get_final_message()
+    
+    return response, time_to_first_token
+
 ##############################################################################
 # GENERATE META AND HEADINGS
 ##############################################################################
-def generate_meta_and_headings(requirements, settings=None):
-    """Generate meta title, description, and heading structure based on requirements."""
-    if settings is None:
-        settings = {}
-    
-    model = settings.get('model', 'claude')
-    anthropic_api_key = settings.get('anthropic_api_key', '')
-    openai_api_key = settings.get('openai_api_key', '')
-    
-    if model == 'claude' and not anthropic_api_key:
-        raise ValueError("Claude API key must be provided to use Claude")
+def build_heading_prompts(requirements):
+    """
+    Builds the prompts for the meta title, description and heading structure.
     
+    Args:
+        requirements (dict): Requirements from parse_cora_report
+        
+    Returns:
+        tuple: (system prompt, cacheable requirements prefix, user prompt)
+    """
     primary_keyword = requirements.get('primary_keyword', '')
     variations = requirements.get('variations', [])
     lsi_dict = requirements.get('lsi_keywords', {})
@@ -488,15 +958,18 @@ You are a professional SEO content strategist and copywriter. Your job is to cre
 You have a strong understanding of SEO best practices, entity based SEO and semantic SEO. You write content that ranks well in search engine results. You are also an expert in content writing and can write content that is engaging and informative. You understand the needs of the client and their desired and strict requirements. You will not deviate from the requirements. You are capable of following the requirements strictly. You are creative and capable of delivering content that stays topically and semantically relevent to the specific page.
 """
     
-    user_prompt_heading = f"""
-Please create a meta title, meta description, and heading structure for a piece of content about "{primary_keyword}".
-
-<requirements>
+    # The requirements block only changes with the report, so it is sent
+    # first as a cacheable prefix (see call_claude_api)
+    requirements_prompt_heading = f"""<requirements>
 - Primary Keyword: {primary_keyword}
 - Variations to consider: {', '.join(variations[:5])}
 - LSI Keywords to Include:{lsi_formatted}
 - Entities to Include: {', '.join(entities[:10])}
 </requirements>
+"""
+    
+    user_prompt_heading = f"""
+Please create a meta title, meta description, and heading structure for a piece of content about "{primary_keyword}", using the requirements above.
 
 <step 1>
 Using the information and requirements provided tackle the SEO-optimized content. First, establish the key elements required:
@@ -553,22 +1026,47 @@ HEADING STRUCTURE:
 ## Heading 2
 etc.]"""
     
-    # Save the prompt to a file for reference
-    with open("heading_prompt.txt", "w") as f:
-        f.write(f"System Prompt:\n{system_prompt}\n\n\nUser Prompt:{user_prompt_heading}")
-    
     # Print debug information
     print(f"Meta Title Length Used: {meta_title_length}")
     print(f"Meta Description Length Used: {meta_desc_length}")
     print(f"Heading Structure: {heading_structure}")
     
+    return system_prompt, requirements_prompt_heading, user_prompt_heading
+
+def generate_meta_and_headings(requirements, settings=None):
+    """Generate meta title, description, and heading structure based on requirements."""
+    if settings is None:
+        settings = {}
+    
+    model = settings.get('model', 'claude')
+    anthropic_api_key = settings.get('anthropic_api_key', '')
+    openai_api_key = settings.get('openai_api_key', '')
+    
+    if model == 'claude' and not anthropic_api_key:
+        raise ValueError("Claude API key must be provided to use Claude")
+    
+    system_prompt, requirements_prompt_heading, user_prompt_heading = build_heading_prompts(requirements)
+    
+    # Save the prompt to a file for reference
+    with open(os.path.join(settings.get('output_dir', ''), "heading_prompt.txt"), "w") as f:
+        f.write(f"System Prompt:\n{system_prompt}\n\n\nUser Prompt:\n{requirements_prompt_heading}{user_prompt_heading}")
+    
     # Make the API call
     if model == 'claude':
-        result, token_usage = call_claude_api(system_prompt, user_prompt_heading, anthropic_api_key, is_content_generation=False)
+        result, token_usage = call_claude_api(system_prompt, user_prompt_heading, anthropic_api_key, is_content_generation=False, use_cache=settings.get('use_cache', True), cacheable_prefix=requirements_prompt_heading, token_budgets=compute_token_budgets(requirements, is_content_generation=False))
     else:
         raise ValueError(f"Unsupported model: {model}")
     
     # Parse the result to extract meta title, description, and headings
+    return dict(parse_heading_response(result), token_usage=token_usage)
+
+def parse_heading_response(result):
+    """
+    Parses the meta title, description and heading structure out of a heading response.
+    
+    Returns:
+        dict: meta_title, meta_description and heading_structure ("" when missing)
+    """
     meta_title = ""
     meta_description = ""
     heading_structure = ""
@@ -585,22 +1083,23 @@ etc.]"""
     return {
         "meta_title": meta_title,
         "meta_description": meta_description,
-        "heading_structure": heading_structure,
-        "token_usage": token_usage
+        "heading_structure": heading_structure
     }
 
-def generate_content_from_headings(requirements, heading_structure, settings=None):
-    """Generate content based on the provided heading structure."""
-    if settings is None:
-        settings = {}
-    
-    # Print debug info about inputs
-    print(f"Content Generation Starting:")
-    print(f"API Key Available: {'Yes' if settings.get('anthropic_api_key') else 'No'}")
-    print(f"Word Count Requested: {requirements.get('word_count', 'Not specified')}")
-    print(f"LSI Limit: {requirements.get('lsi_limit', 'Not specified')}")
-    print(f"Heading Structure Length: {len(heading_structure) if heading_structure else 0} chars")
+# System prompt for every content call, whole article or single section
+CONTENT_SYSTEM_PROMPT = """You are an expert SEO content writer with deep knowledge about creating high-quality, engaging, and optimized content. You have a strong understanding of SEO best practices, entity based SEO and semantic SEO. You write content that ranks well in search engine results. You are also an expert in content writing and can write content that is engaging and informative. You understand the needs of the client and their desired and strict word count requirements. You will not deviate from the requirements. You will not add or remove any content from the headings structure. You are capable of following the requirements strictly. You are capable of detecting when content is locally based and will generate content to help in Local Search Rankings by seemlessly making accurate local references."""
+
+def build_content_prompts(requirements, heading_structure):
+    """
+    Builds the prompts for writing the article under a heading structure.
     
+    Args:
+        requirements (dict): Requirements, with meta_title and meta_description when known
+        heading_structure (str): Markdown heading outline from generate_meta_and_headings
+        
+    Returns:
+        tuple: (system prompt, cacheable requirements prefix, user prompt)
+    """
     primary_keyword = requirements.get('primary_keyword', '')
     variations = requirements.get('variations', [])
     lsi_dict = requirements.get('lsi_keywords', {})
@@ -647,19 +1146,39 @@ def generate_content_from_headings(requirements, heading_structure, settings=Non
         heading_structure = "# " + primary_keyword
     
     # Construct the system prompt
-    system_prompt = """You are an expert SEO content writer with deep knowledge about creating high-quality, engaging, and optimized content. You have a strong understanding of SEO best practices, entity based SEO and semantic SEO. You write content that ranks well in search engine results. You are also an expert in content writing and can write content that is engaging and informative. You understand the needs of the client and their desired and strict word count requirements. You will not deviate from the requirements. You will not add or remove any content from the headings structure. You are capable of following the requirements strictly. You are capable of detecting when content is locally based and will generate content to help in Local Search Rankings by seemlessly making accurate local references."""
+    system_prompt = CONTENT_SYSTEM_PROMPT
+    
+    # Construct the per-report requirements section. It is the same for every
+    # run on a report, so it is sent first as a cacheable prefix (see call_claude_api)
+    requirements_prompt = f"""
+# SEO Requirements for **{primary_keyword}**
+
+1. Keyword Usage Requirements:
+- Primary Keyword: {primary_keyword}
+- Use the primary keyword ({primary_keyword}) in the first 100 words, in at least one H2 heading, and naturally throughout the content.
+
+2. Keyword Variations:
+- Include these keyword variations naturally: **note**: use at least 1 time each is your primary goal in this sub-step
+{variations_text}
+    
+3. LSI Keywords to Include (with minimum frequencies): **note**: use at least 1 time each is your primary goal in this sub-step
+{lsi_formatted_100}
+    
+4. Entities/Topics to Cover: **Note**: Your primary goal in this sub-step is to use each entity at least once within the content with a secondary goal of 8-10% entity density**
+{entities_text}
+"""
     
     # Construct the user prompt for content generation
     user_prompt = f"""
 # SEO Content Writing Task
 
-Please write a comprehensive, SEO-optimized article about **{primary_keyword}**. 
+Please write a comprehensive, SEO-optimized article about **{primary_keyword}** that meets the SEO requirements above. 
     
-1. Meta Information (do not change or add to it):
+5. Meta Information (do not change or add to it):
 - Meta Title: {meta_title}
 - Meta Description: {meta_description}
     
-2. Key Requirements:
+6. Key Requirements:
 - Word Count: {word_count} words (minimum). This word count is extremely strict. Must be no less than {word_count} but no more than {word_count + 100}. 
 - Primary Keyword: {primary_keyword}
 - Use the EXACT following heading structure to generate content (**very important**: do not change or add to the headings):
@@ -667,19 +1186,6 @@ Please write a comprehensive, SEO-optimized article about **{primary_keyword}**.
 {heading_structure}
 </headings_structure>
     
-3. Keyword Usage Requirements:
-- Use the primary keyword ({primary_keyword}) in the first 100 words, in at least one H2 heading, and naturally throughout the content.
-
-4. Keyword Variations:
-- Include these keyword variations naturally: **note**: use at least 1 time each is your primary goal in this sub-step
-{variations_text}
-    
-5. LSI Keywords to Include (with minimum frequencies): **note**: use at least 1 time each is your primary goal in this sub-step
-{lsi_formatted_100}
-    
-6. Entities/Topics to Cover: **Note**: Your primary goal in this sub-step is to use each entity at least once within the content with a secondary goal of 8-10% entity density**
-{entities_text}
-    
 7. Content Writing Guidelines:
 - 1. Write in a clear, authoritative style suitable for an expert audience
 - 2. Make the content deeply informative and comprehensive
@@ -697,20 +1203,66 @@ Please write a comprehensive, SEO-optimized article about **{primary_keyword}**.
 IMPORTANT: Return ONLY the pure markdown content without any explanations, introductions, or notes about your approach.
 """
     
+    return system_prompt, requirements_prompt, user_prompt
+
+def generate_content_from_headings(requirements, heading_structure, settings=None, on_text=None):
+    """
+    Generate content based on the provided heading structure.
+    
+    Pass on_text to stream the article: it is called with each markdown
+    delta as it arrives (see call_claude_api). With settings
+    "parallel_sections" the article is written section by section
+    concurrently instead (see generate_content_by_sections). The prompt
+    and the article are written to settings "output_dir" (default: the
+    working directory).
+    """
+    if settings is None:
+        settings = {}
+    
+    if settings.get('parallel_sections') and len(split_heading_sections(heading_structure or "")) > 1:
+        return generate_content_by_sections(requirements, heading_structure, settings, on_text)
+    
+    # Print debug info about inputs
+    print(f"Content Generation Starting:")
+    print(f"API Key Available: {'Yes' if settings.get('anthropic_api_key') else 'No'}")
+    print(f"Word Count Requested: {requirements.get('word_count', 'Not specified')}")
+    print(f"LSI Limit: {requirements.get('lsi_limit', 'Not specified')}")
+    print(f"Heading Structure Length: {len(heading_structure) if heading_structure else 0} chars")
+    
+    primary_keyword = requirements.get('primary_keyword', '')
+    system_prompt, requirements_prompt, user_prompt = build_content_prompts(requirements, heading_structure)
+    
     # Save the prompt to a file for reference
-    with open("content_prompt.txt", "w", encoding="utf-8") as f:
-        f.write(user_prompt)
+    with open(os.path.join(settings.get('output_dir', ''), "content_prompt.txt"), "w", encoding="utf-8") as f:
+        f.write(requirements_prompt + user_prompt)
+    
+    # Size the output and thinking budgets to this article
+    token_budgets = compute_token_budgets(requirements, is_content_generation=True)
     
     # Call the API based on the settings
     if settings.get('model', '').lower() == 'claude' and settings.get('anthropic_api_key'):
-        result, token_usage = call_claude_api(system_prompt, user_prompt, settings.get('anthropic_api_key'), is_content_generation=True)
+        result, token_usage = call_claude_api(system_prompt, user_prompt, settings.get('anthropic_api_key'), is_content_generation=True, on_text=on_text, use_cache=settings.get('use_cache', True), cacheable_prefix=requirements_prompt, token_budgets=token_budgets)
     else:
         # Default to Claude if no valid settings are provided
         if settings.get('anthropic_api_key'):
-            result, token_usage = call_claude_api(system_prompt, user_prompt, settings.get('anthropic_api_key'), is_content_generation=True)
+            result, token_usage = call_claude_api(system_prompt, user_prompt, settings.get('anthropic_api_key'), is_content_generation=True, on_text=on_text, use_cache=settings.get('use_cache', True), cacheable_prefix=requirements_prompt, token_budgets=token_budgets)
         else:
             raise ValueError("No valid API key provided. Please provide either an Anthropic or OpenAI API key.")
     
+    filename = os.path.join(settings.get('output_dir', ''), f"seo_content_{primary_keyword.replace(' ', '_').lower()}.md")
+    return dict(finalize_content(result, filename), token_usage=token_usage)
+
+def finalize_content(result, filename):
+    """
+    Turns a content response into clean markdown and HTML and saves the markdown.
+    
+    Args:
+        result (str): Response text of the content call
+        filename (str): Where to write the markdown
+        
+    Returns:
+        dict: markdown, html and filename
+    """
     # Process the result to get clean markdown
     markdown_content = extract_markdown_content(result)
     
@@ -723,11 +1275,262 @@ IMPORTANT: Return ONLY the pure markdown content without any explanations, intro
     html_content = markdown_to_html(markdown_content)
     
     # Save to a file
-    filename = f"seo_content_{primary_keyword.replace(' ', '_').lower()}.md"
     with open(filename, "w", encoding="utf-8") as f:
         f.write(markdown_content)
     
     # Return results as a dictionary with all necessary information
+    return {
+        'markdown': markdown_content,
+        'html': html_content,
+        'filename': filename
+    }
+
+##############################################################################
+# SECTION-PARALLEL CONTENT GENERATION
+##############################################################################
+# Sections written at once by default; the scheduler still paces the calls
+DEFAULT_SECTION_CONCURRENCY = 8
+
+H2_PATTERN = re.compile(r'^##(?!#)\s')
+HEADING_LINE_PATTERN = re.compile(r'^(#{1,6})\s')
+
+def split_heading_sections(heading_structure):
+    """
+    Splits a markdown heading outline into H2-rooted sections.
+    
+    Each section starts at an H2 and runs until the next H2, so it carries
+    the H3-H6 headings nested under it. Lines before the first H2 (the H1)
+    form the opening section.
+    
+    Args:
+        heading_structure (str): Markdown heading outline
+        
+    Returns:
+        list: The outline of each section, in document order
+    """
+    sections = [[]]
+    for line in heading_structure.splitlines():
+        if not line.strip():
+            continue
+        if H2_PATTERN.match(line.strip()) and sections[-1]:
+            sections.append([])
+        sections[-1].append(line.rstrip())
+    return ["\n".join(section) for section in sections if section]
+
+def allocate_section_requirements(requirements, sections):
+    """
+    Shares the article's targets out between its sections.
+    
+    Words are split in proportion to the number of headings in each section.
+    Keyword variations and entities are dealt out round-robin so each is
+    placed once, and the required occurrences of every LSI keyword are
+    spread across sections the same way.
+    
+    Args:
+        requirements (dict): Requirements for the whole article
+        sections (list): Section outlines from split_heading_sections
+        
+    Returns:
+        list: One requirements dict per section
+    """
+    section_count = len(sections)
+    heading_counts = [
+        [len(HEADING_LINE_PATTERN.match(line).group(1)) for line in section.splitlines() if HEADING_LINE_PATTERN.match(line)]
+        for section in sections
+    ]
+    weights = [max(len(levels), 1) for levels in heading_counts]
+    word_count = int(requirements.get('word_count', 1500) or 1500)
+    
+    section_variations = [[] for _ in sections]
+    for index, variation in enumerate(requirements.get('variations', [])[:10]):
+        section_variations[index % section_count].append(variation)
+    
+    section_entities = [[] for _ in sections]
+    for index, entity in enumerate(requirements.get('entities', [])[:20]):
+        section_entities[index % section_count].append(entity)
+    
+    # Same keyword selection as build_content_prompts
+    lsi_dict = requirements.get('lsi_keywords', {})
+    lsi_limit = requirements.get('lsi_limit', 100)
+    if isinstance(lsi_dict, dict):
+        top_lsi_keywords = sorted(lsi_dict.items(), key=lambda x: x[1], reverse=True)[:min(lsi_limit, len(lsi_dict))]
+    else:
+        top_lsi_keywords = [(kw, 1) for kw in lsi_dict[:min(lsi_limit, len(lsi_dict))]]
+    section_lsi = [{} for _ in sections]
+    cursor = 0
+    for kw, freq in top_lsi_keywords:
+        for _ in range(max(math.ceil(freq), 1)):
+            target = section_lsi[cursor % section_count]
+            target[kw] = target.get(kw, 0) + 1
+            cursor += 1
+    
+    section_requirements = []
+    for index, levels in enumerate(heading_counts):
+        heading_requirements = {f"Number of H{level} tags": levels.count(level) for level in range(2, 7)}
+        section_requirements.append(dict(
+            requirements,
+            word_count=max(round(word_count * weights[index] / sum(weights)), 50),
+            variations=section_variations[index],
+            entities=section_entities[index],
+            lsi_keywords=section_lsi[index],
+            lsi_limit=len(section_lsi[index]),
+            requirements=heading_requirements
+        ))
+    return section_requirements
+
+def build_section_context(requirements, heading_structure):
+    """
+    Builds the brief shared by every section writer: topic, meta tags, tone
+    and the full outline, so separately written sections read as one article.
+    It is identical for all sections and sent as the cacheable prefix.
+    """
+    primary_keyword = requirements.get('primary_keyword', '')
+    return f"""
+# Article Brief for **{primary_keyword}**
+
+Several writers are each writing one section of this article at the same time from this same brief. Stay strictly within your own section so the sections fit together without gaps or repetition.
+
+- Primary Keyword: {primary_keyword}
+- Meta Title: {requirements.get('meta_title', '')}
+- Meta Description: {requirements.get('meta_description', '')}
+- Total Word Count: {requirements.get('word_count', 1500)} words across all sections
+- Voice: clear and authoritative for an expert audience, always active voice, conversational but professional
+- Only factually accurate information; no placeholders and no suggestions that the client add information
+
+Full heading structure of the article (for context; you write only your section):
+<headings_structure>
+{heading_structure}
+</headings_structure>
+"""
+
+def build_section_prompt(section_requirements, section_outline, index, section_count):
+    """Builds the user prompt asking for one section under the shared brief."""
+    primary_keyword = section_requirements.get('primary_keyword', '')
+    word_count = section_requirements['word_count']
+    
+    if index == 0:
+        position = f"This is the opening of the article: include the primary keyword ({primary_keyword}) in the first 100 words."
+    elif index == section_count - 1:
+        position = "This is the final section of the article. Close it naturally, without the phrases \"in conclusion\" or \"in summary\"."
+    else:
+        position = "This section sits in the middle of the article: do not write an introduction or a conclusion for the article."
+    
+    variations_text = ", ".join(section_requirements['variations']) or "None"
+    lsi_text = "\n".join(f"- '{kw}' => use at least {freq} times" for kw, freq in section_requirements['lsi_keywords'].items()) or "- None"
+    entities_text = "\n".join(f"- {entity}" for entity in section_requirements['entities']) or "- None"
+    
+    return f"""
+# Section Writing Task
+
+Write ONLY section {index + 1} of {section_count} of the article, using EXACTLY these headings (**very important**: do not change or add to the headings):
+<section_headings>
+{section_outline}
+</section_headings>
+
+{position}
+
+Requirements for this section:
+- Word Count: about {word_count} words (between {max(word_count - 25, 1)} and {word_count + 25})
+- Keyword variations to use at least once: {variations_text}
+- LSI keywords (with minimum frequencies):
+{lsi_text}
+- Entities/Topics to cover:
+{entities_text}
+
+Format the section in markdown, starting with its first heading line.
+
+IMPORTANT: Return ONLY the pure markdown for this section without any explanations, introductions, or notes about your approach.
+"""
+
+def generate_content_by_sections(requirements, heading_structure, settings=None, on_text=None):
+    """
+    Generates an article section by section, with all sections in flight at once.
+    
+    The outline is split into H2-rooted sections (split_heading_sections),
+    each gets a share of the targets (allocate_section_requirements) and
+    the shared brief, and the sections are written concurrently and
+    stitched back together in order. Wall-clock time is roughly that of the
+    longest section rather than of the whole article.
+    
+    Args:
+        requirements (dict): Requirements, with meta_title and meta_description when known
+        heading_structure (str): Markdown heading outline
+        settings (dict): anthropic_api_key, use_cache and optionally section_concurrency and output_dir
+        on_text (callable): Called with each finished section's markdown, in document order
+        
+    Returns:
+        dict: markdown, html, filename and token_usage summed over the sections
+    """
+    if settings is None:
+        settings = {}
+    api_key = settings.get('anthropic_api_key')
+    if not api_key:
+        raise ValueError("No valid API key provided. Please provide either an Anthropic or OpenAI API key.")
+    
+    primary_keyword = requirements.get('primary_keyword', '')
+    if not heading_structure or not heading_structure.strip():
+        heading_structure = "# " + primary_keyword
+    sections = split_heading_sections(heading_structure)
+    section_requirements = allocate_section_requirements(requirements, sections)
+    context = build_section_context(requirements, heading_structure)
+    prompts = [
+        build_section_prompt(section_requirements[index], section, index, len(sections))
+        for index, section in enumerate(sections)
+    ]
+    
+    # Save the prompts to a file for reference
+    with open(os.path.join(settings.get('output_dir', ''), "content_prompt.txt"), "w", encoding="utf-8") as f:
+        f.write(context + "".join(f"\n--- Section {index + 1} ---{prompt}" for index, prompt in enumerate(prompts)))
+    
+    print(f"Section-parallel generation: {len(sections)} sections, words {[r['word_count'] for r in section_requirements]}")
+    start_time = time.perf_counter()
+    
+    section_markdown = [None] * len(sections)
+    section_usage = [None] * len(sections)
+    emitted = [0]
+    emit_lock = threading.Lock()
+    
+    def emit_ready_sections():
+        # Pass finished sections on in document order, so a live preview grows top to bottom
+        with emit_lock:
+            while emitted[0] < len(sections) and section_markdown[emitted[0]] is not None:
+                if on_text is not None:
+                    on_text(("\n\n" if emitted[0] else "") + section_markdown[emitted[0]])
+                emitted[0] += 1
+    
+    def write_section(index):
+        result, usage = call_claude_api(
+            CONTENT_SYSTEM_PROMPT, prompts[index], api_key,
+            is_content_generation=True,
+            use_cache=settings.get('use_cache', True),
+            cacheable_prefix=context,
+            token_budgets=compute_token_budgets(section_requirements[index], is_content_generation=True)
+        )
+        return index, (extract_markdown_content(result) or result).strip(), usage
+    
+    concurrency = settings.get('section_concurrency', DEFAULT_SECTION_CONCURRENCY)
+    with ThreadPoolExecutor(max_workers=max(min(concurrency, len(sections)), 1), thread_name_prefix="section") as executor:
+        futures = [executor.submit(write_section, index) for index in range(len(sections))]
+        for future in as_completed(futures):
+            index, markdown_content, usage = future.result()
+            section_markdown[index] = markdown_content
+            section_usage[index] = usage
+            emit_ready_sections()
+    
+    markdown_content = "\n\n".join(section_markdown)
+    html_content = markdown_to_html(markdown_content)
+    filename = os.path.join(settings.get('output_dir', ''), f"seo_content_{primary_keyword.replace(' ', '_').lower()}.md")
+    with open(filename, "w", encoding="utf-8") as f:
+        f.write(markdown_content)
+    
+    token_usage = {
+        key: sum(usage.get(key, 0) for usage in section_usage)
+        for key in TOKEN_USAGE_KEYS
+    }
+    token_usage["sections"] = len(sections)
+    token_usage["generation_seconds"] = round(time.perf_counter() - start_time, 3)
+    print(f"Section-parallel generation finished in {token_usage['generation_seconds']:.1f}s")
+    
     return {
         'markdown': markdown_content,
         'html': html_content,
@@ -735,6 +1538,206 @@ IMPORTANT: Return ONLY the pure markdown content without any explanations, intro
         'token_usage': token_usage
     }
 
+##############################################################################
+# REPAIR MISSING TERMS
+##############################################################################
+# Terms woven into a single paragraph at most, so no paragraph reads stuffed
+MAX_TERMS_PER_PARAGRAPH = 3
+
+REPAIR_SYSTEM_PROMPT = """You are an expert SEO editor. You revise individual paragraphs of an existing article so they naturally include required terms, while keeping each paragraph's meaning, facts, voice and approximate length. You never add headings, notes or commentary."""
+
+PARAGRAPH_TAG_PATTERN = re.compile(r'<paragraph id="(\d+)">\s*(.*?)\s*</paragraph>', re.DOTALL)
+WORD_PATTERN = re.compile(r"[a-z0-9']+")
+# Opening or closing line of a fenced code block (``` or ~~~)
+FENCE_PATTERN = re.compile(r'^ {0,3}(`{3,}|~{3,})', re.MULTILINE)
+
+def collect_missing_terms(analysis):
+    """
+    Collects the terms an analysis marks as under target.
+    
+    Args:
+        analysis (dict): Result of analyze_content
+        
+    Returns:
+        dict: term -> number of extra occurrences needed (LSI keywords may
+              need several; variations and entities need one)
+    """
+    missing = {}
+    for keyword, info in analysis.get("lsi_keywords", {}).items():
+        shortfall = math.ceil(info["target"]) - info["count"]
+        if info["status"] == "❌" and shortfall > 0:
+            missing[keyword] = shortfall
+    for group in ("variations", "entities"):
+        terms = analysis.get(group, {})
+        if not isinstance(terms, dict):
+            continue
+        for term, info in terms.items():
+            if info["count"] == 0:
+                missing[term] = max(missing.get(term, 0), 1)
+    return missing
+
+def split_markdown_blocks(markdown_content):
+    """
+    Splits markdown into blank-line separated blocks (headings, paragraphs,
+    lists, tables). A fenced code block stays one block, blank lines and all.
+    """
+    blocks = []
+    lines = []
+    fence = None
+    for line in markdown_content.strip().split("\n"):
+        if fence is None and not line.strip():
+            if lines:
+                blocks.append("\n".join(lines))
+                lines = []
+            continue
+        lines.append(line)
+        match = FENCE_PATTERN.match(line)
+        if match is None:
+            continue
+        if fence is None:
+            fence = match.group(1)
+        elif match.group(1).startswith(fence) and not line.strip().strip(fence[0]):
+            # A closing fence uses the same character, at least as many times, and nothing else
+            fence = None
+    if lines:
+        blocks.append("\n".join(lines))
+    return blocks
+
+def is_prose_block(block):
+    """True for blocks a rewrite may touch: not headings, tables, code or HTML."""
+    first = block.lstrip()
+    return not first.startswith(("#", "|", "<", "---")) and not FENCE_PATTERN.search(block)
+
+def assign_terms_to_paragraphs(blocks, missing_terms):
+    """
+    Picks the paragraphs to rewrite and the terms each should gain.
+    
+    Each needed occurrence goes to the prose paragraph whose words (and
+    section heading) overlap the term most, preferring longer paragraphs,
+    with at most MAX_TERMS_PER_PARAGRAPH terms per paragraph.
+    
+    Returns:
+        dict: block index -> list of terms, in document order
+    """
+    candidates = []
+    heading_words = set()
+    for index, block in enumerate(blocks):
+        if block.lstrip().startswith("#"):
+            heading_words = set(WORD_PATTERN.findall(block.lower()))
+        elif is_prose_block(block):
+            words = WORD_PATTERN.findall(block.lower())
+            candidates.append((index, set(words) | heading_words, len(words)))
+    if not candidates:
+        return {}
+    
+    assignments = {}
+    # Hardest terms (most occurrences needed) first, so they get the best fits
+    for term, needed in sorted(missing_terms.items(), key=lambda item: -item[1]):
+        term_words = set(WORD_PATTERN.findall(term.lower()))
+        ranked = sorted(candidates, key=lambda c: (len(term_words & c[1]), c[2]), reverse=True)
+        placed = 0
+        for index, _, _ in ranked:
+            if placed == needed:
+                break
+            terms = assignments.setdefault(index, [])
+            if len(terms) < MAX_TERMS_PER_PARAGRAPH and term not in terms:
+                terms.append(term)
+                placed += 1
+    return {index: assignments[index] for index in sorted(assignments) if assignments[index]}
+
+def repair_content(markdown_content, analysis, requirements, settings=None):
+    """
+    Rewrites only the paragraphs needed to add missing LSI keywords, variations and entities.
+    
+    Under-target terms are read from the analysis, assigned to the best
+    fitting paragraphs (assign_terms_to_paragraphs) and sent in one small
+    call without extended thinking. The rewritten paragraphs are spliced
+    back in place; everything else, headings included, is left untouched.
+    
+    Args:
+        markdown_content (str): The generated article
+        analysis (dict): Result of analyze_content for that article
+        requirements (dict): Requirements the article was written for
+        settings (dict): anthropic_api_key, use_cache and optionally output_dir
+        
+    Returns:
+        dict: markdown, html, filename, token_usage, repaired_paragraphs and
+              terms (the missing terms assigned to a paragraph for rewriting)
+    """
+    if settings is None:
+        settings = {}
+    api_key = settings.get('anthropic_api_key')
+    if not api_key:
+        raise ValueError("Claude API key must be provided to use Claude")
+    
+    missing_terms = collect_missing_terms(analysis)
+    blocks = split_markdown_blocks(markdown_content)
+    assignments = assign_terms_to_paragraphs(blocks, missing_terms)
+    primary_keyword = requirements.get('primary_keyword', '')
+    filename = os.path.join(settings.get('output_dir', ''), f"seo_content_{primary_keyword.replace(' ', '_').lower()}.md")
+    
+    if not assignments:
+        return {
+            'markdown': markdown_content,
+            'html': markdown_to_html(markdown_content),
+            'filename': filename,
+            'token_usage': {},
+            'repaired_paragraphs': 0,
+            'terms': []
+        }
+    
+    paragraphs_text = "\n\n".join(
+        f"<paragraph id=\"{index}\">\nTerms to include: {', '.join(terms)}\n{blocks[index]}\n</paragraph>"
+        for index, terms in assignments.items()
+    )
+    user_prompt = f"""
+Below are paragraphs from an article about **{primary_keyword}**. Rewrite each paragraph so it naturally includes every term listed for it, each exactly as written, at least once.
+
+Rules:
+- Keep the meaning, facts, voice and formatting (lists stay lists) of each paragraph
+- Keep each paragraph within about 20% of its current length
+- Do not add headings, notes or explanations
+
+{paragraphs_text}
+
+Return every paragraph in the same tags, without the "Terms to include" line:
+<paragraph id="N">
+rewritten paragraph
+</paragraph>
+"""
+    
+    paragraph_tokens = sum(len(blocks[index]) for index in assignments) // CHARS_PER_TOKEN
+    token_budgets = {"max_tokens": min(int(paragraph_tokens * 1.5) + 500, CLAUDE_MAX_NONSTREAMING_TOKENS), "thinking_budget": 0}
+    print(f"Repairing {len(missing_terms)} missing terms across {len(assignments)} paragraphs")
+    result, token_usage = call_claude_api(
+        REPAIR_SYSTEM_PROMPT, user_prompt, api_key,
+        use_cache=settings.get('use_cache', True),
+        token_budgets=token_budgets
+    )
+    
+    repaired = 0
+    for match in PARAGRAPH_TAG_PATTERN.finditer(result):
+        index = int(match.group(1))
+        paragraph = re.sub(r'^Terms to include:.*\n?', '', match.group(2)).strip()
+        # Only splice well-formed answers for paragraphs we asked about
+        if index in assignments and paragraph and is_prose_block(paragraph):
+            blocks[index] = paragraph
+            repaired += 1
+    
+    markdown_content = "\n\n".join(blocks)
+    html_content = markdown_to_html(markdown_content)
+    with open(filename, "w", encoding="utf-8") as f:
+        f.write(markdown_content)
+    
+    return {
+        'markdown': markdown_content,
+        'html': html_content,
+        'filename': filename,
+        'token_usage': token_usage,
+        'repaired_paragraphs': repaired,
+        'terms': sorted({term for terms in assignments.values() for term in terms})
+    }
+
 def generate_content(requirements, settings=None):
     """Legacy function that combines both steps for backward compatibility."""
     if settings is None:
@@ -853,57 +1856,16 @@ def markdown_to_html(markdown_content):
     """
     Convert markdown to HTML.
     
+    The markdown is parsed once into a shared document (see document.py),
+    which the app then reuses for the preview, heading counts and analysis.
+    
     Args:
         markdown_content (str): Markdown content to convert
         
     Returns:
         str: HTML content
     """
-    try:
-        import markdown
-        # Convert markdown to HTML
-        converted_html = markdown.markdown(markdown_content)
-        
-        # Wrap in HTML document with styling
-        html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Generated Content</title>
-            <style>
-                body {{ font-family: Arial, sans-serif; line-height: 1.6; max-width: 800px; margin: 0 auto; padding: 20px; }}
-                h1 {{ color: #333; }}
-                h2 {{ color: #444; border-bottom: 1px solid #eee; padding-bottom: 10px; }}
-                h3 {{ color: #555; }}
-                code {{ background-color: #f5f5f5; padding: 2px 4px; border-radius: 4px; }}
-                pre {{ background-color: #f5f5f5; padding: 10px; border-radius: 4px; overflow-x: auto; }}
-                blockquote {{ border-left: 4px solid #ddd; padding-left: 10px; color: #666; }}
-                a {{ color: #0366d6; text-decoration: none; }}
-                a:hover {{ text-decoration: underline; }}
-            </style>
-        </head>
-        <body>
-            {converted_html}
-        </body>
-        </html>
-        """
-    except ImportError:
-        # Fallback if markdown library isn't available
-        html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Generated Content</title>
-            <style>
-                body {{ font-family: Arial, sans-serif; line-height: 1.6; max-width: 800px; margin: 0 auto; padding: 20px; }}
-            </style>
-        </head>
-        <body>
-            <pre>{markdown_content}</pre>
-        </body>
-        </html>
-        """
-    return html
+    return get_document(markdown_content).html
 
 ##############################################################################
 # MAIN FUNCTION
@@ -0,0 +1,189 @@
+import time
+import random
+import logging
+import threading
+
+import anthropic
+
+# HTTP statuses worth retrying: rate limits (429), overload (529) and
+# transient server errors, matching what the SDK itself retries
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504, 529}
+
+# Rough characters-per-token ratio used to size requests before sending them
+CHARS_PER_TOKEN = 4
+
+##############################################################################
+# TOKEN BUCKET
+##############################################################################
+class TokenBucket:
+    """
+    A thread-safe token bucket refilled continuously at a per-minute rate.
+
+    Requests larger than the whole bucket are clamped to its capacity, so
+    they wait for a full bucket instead of blocking forever.
+    """
+
+    def __init__(self, tokens_per_minute):
+        """
+        Args:
+            tokens_per_minute (int): Bucket capacity and refill rate
+        """
+        self.capacity = float(tokens_per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._condition = threading.Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, amount):
+        """
+        Blocks until amount tokens are available, then takes them.
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        amount = min(float(amount), self.capacity)
+        start = time.monotonic()
+        with self._condition:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return time.monotonic() - start
+                self._condition.wait((amount - self.tokens) / self.rate)
+
+    def release(self, amount):
+        """Returns unused tokens to the bucket (e.g. output tokens a reply did not use)."""
+        if amount <= 0:
+            return
+        with self._condition:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + amount)
+            self._condition.notify_all()
+
+##############################################################################
+# SCHEDULER
+##############################################################################
+def estimate_input_tokens(request):
+    """
+    Estimates the input tokens of a Messages API request from its text length.
+
+    Args:
+        request (dict): Keyword arguments for messages.create
+
+    Returns:
+        int: Estimated input tokens
+    """
+    def text_length(content):
+        if isinstance(content, str):
+            return len(content)
+        if isinstance(content, list):
+            return sum(len(block.get("text", "")) for block in content if isinstance(block, dict))
+        return 0
+
+    characters = text_length(request.get("system", ""))
+    for message in request.get("messages", []):
+        characters += text_length(message.get("content", ""))
+    return characters // CHARS_PER_TOKEN + 1
+
+def get_retry_after(error):
+    """Returns the server's retry-after delay in seconds, or None if it did not send one."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    retry_after = response.headers.get("retry-after")
+    if retry_after is None:
+        return None
+    try:
+        return max(float(retry_after), 0.0)
+    except ValueError:
+        return None
+
+def is_retryable(error):
+    """True for rate-limit, overload, transient server and connection errors."""
+    if isinstance(error, anthropic.APIConnectionError):
+        return True
+    if isinstance(error, anthropic.APIStatusError):
+        return error.status_code in RETRYABLE_STATUS_CODES
+    return False
+
+class ClaudeScheduler:
+    """
+    Paces Claude requests to the organisation's token-per-minute limits and
+    retries rate-limit and overload errors.
+
+    Before a request is sent, its estimated input tokens (prompt length) are
+    taken from the input bucket and its max_tokens from the output bucket.
+    Output tokens the reply did not use are returned afterwards. Retryable
+    errors wait for the server's retry-after header when present, otherwise
+    for an exponential backoff with full jitter.
+    """
+
+    def __init__(self, input_tokens_per_minute, output_tokens_per_minute, max_retries=6, base_delay=1.0, max_delay=60.0):
+        """
+        Args:
+            input_tokens_per_minute (int): Input token limit (ITPM)
+            output_tokens_per_minute (int): Output token limit (OTPM)
+            max_retries (int): Retries before the error is raised
+            base_delay (float): First backoff delay in seconds
+            max_delay (float): Upper bound on a single backoff delay
+        """
+        self.input_bucket = TokenBucket(input_tokens_per_minute)
+        self.output_bucket = TokenBucket(output_tokens_per_minute)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff_delay(self, attempt, error):
+        """Seconds to wait before retry number attempt (0-based)."""
+        retry_after = get_retry_after(error)
+        if retry_after is not None:
+            # Honour the server, plus a little jitter so waiting callers spread out
+            return retry_after + random.uniform(0, self.base_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def call(self, send, request, should_retry=None):
+        """
+        Sends a request once the token budgets allow it, retrying on failure.
+
+        Args:
+            send (callable): Zero-argument function performing the API call
+                and returning the Message
+            request (dict): The request being sent, used to size it
+            should_retry (callable): Optional extra check before each retry,
+                e.g. to refuse once a streamed reply has started
+
+        Returns:
+            The Message returned by send
+        """
+        input_estimate = estimate_input_tokens(request)
+        output_reserve = request.get("max_tokens", 0)
+
+        attempt = 0
+        while True:
+            waited = self.input_bucket.acquire(input_estimate)
+            waited += self.output_bucket.acquire(output_reserve)
+            if waited > 0.5:
+                print(f"Rate limiter: waited {waited:.1f}s for token budget")
+
+            try:
+                response = send()
+            except Exception as e:
+                # The request may not have consumed its output reservation
+                self.output_bucket.release(output_reserve)
+                if not is_retryable(e) or attempt >= self.max_retries or (should_retry and not should_retry()):
+                    raise
+                delay = self.backoff_delay(attempt, e)
+                logging.warning(f"Claude API error ({type(e).__name__}), retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+                time.sleep(delay)
+                attempt += 1
+                continue
+
+            usage = getattr(response, "usage", None)
+            output_tokens = getattr(usage, "output_tokens", output_reserve) if usage else output_reserve
+            self.output_bucket.release(output_reserve - output_tokens)
+            return response
@@ -0,0 +1,271 @@
+import os
+import re
+import sys
+import json
+import argparse
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from analysis import score_articles
+from batch import collect_workbooks, parse_cora_batch
+from batch_generation import article_slug
+from cache import hash_bytes, hash_json, write_json_atomic
+from main import OUTPUT_DIR
+
+# Consolidated report and the per-file results reused by the next run
+REPORT_FILE = "rescore_report.csv"
+RESCORE_STATE_FILE = "rescore_state.json"
+
+# Articles per worker task; each task is scored with one score_articles call
+DEFAULT_CHUNK_SIZE = 100
+
+# Suffixes the generators add after the keyword in seo_content_<keyword>...md:
+# save_markdown_to_file's _iteration_<n>_<timestamp> and batch_generation's _<index>
+ITERATION_SUFFIX_PATTERN = re.compile(r"_iteration_\d+_\d{8}_\d{6}$")
+INDEX_SUFFIX_PATTERN = re.compile(r"_\d+$")
+
+##############################################################################
+# COLLECT ARTICLES
+##############################################################################
+def collect_articles(paths):
+    """
+    Finds the archived seo_content_*.md articles under the given paths.
+
+    Directories are searched recursively, skipping hidden ones (.git,
+    .cache); a file reached through two paths is listed once.
+
+    Args:
+        paths (list): Files and/or directories
+
+    Returns:
+        list: Article paths, sorted within each directory
+    """
+    articles = []
+    seen = set()
+
+    def add(path):
+        real_path = os.path.realpath(path)
+        if real_path not in seen:
+            seen.add(real_path)
+            articles.append(path)
+
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs[:] = sorted(name for name in dirs if not name.startswith("."))
+                for name in sorted(files):
+                    if name.startswith("seo_content_") and name.endswith(".md"):
+                        add(os.path.join(root, name))
+        elif os.path.exists(path):
+            add(path)
+    return articles
+
+def article_keyword_slugs(path):
+    """
+    Keyword slugs an article's file name may stand for, most specific first.
+
+    The index suffix of batch_generation files cannot be told apart from a
+    keyword ending in a number, so both readings are returned.
+    """
+    stem = os.path.splitext(os.path.basename(path))[0][len("seo_content_"):]
+    stem = ITERATION_SUFFIX_PATTERN.sub("", stem)
+    slugs = [article_slug(stem)]
+    without_index = INDEX_SUFFIX_PATTERN.sub("", stem)
+    if without_index != stem:
+        slugs.append(article_slug(without_index))
+    return slugs
+
+##############################################################################
+# LATEST REQUIREMENTS
+##############################################################################
+def load_latest_requirements(paths, max_workers=None):
+    """
+    Collects the newest requirements per primary keyword.
+
+    Args:
+        paths (list): JSONL files written by batch.py, CORA workbooks, or
+            directories of workbooks (parsed with batch.parse_cora_batch)
+        max_workers (int): Worker processes for parsing workbooks
+
+    Returns:
+        dict: keyword slug -> {"requirements", "source", "mtime"}; when a
+            keyword has several reports, the most recently modified wins
+    """
+    records = []
+    workbook_paths = []
+    for path in paths:
+        if path.lower().endswith(".jsonl"):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        record.setdefault("file", path)
+                        records.append(record)
+        else:
+            workbook_paths.append(path)
+    if workbook_paths:
+        records.extend(parse_cora_batch(collect_workbooks(workbook_paths), max_workers))
+
+    latest = {}
+    for record in records:
+        if not record.get("ok", True):
+            continue
+        requirements = record.get("requirements", record)
+        primary_keyword = requirements.get("primary_keyword", "")
+        if not primary_keyword.strip():
+            continue
+        slug = article_slug(primary_keyword)
+        source = record["file"]
+        mtime = os.path.getmtime(source) if os.path.exists(source) else 0.0
+        if slug not in latest or mtime >= latest[slug]["mtime"]:
+            latest[slug] = {"requirements": requirements, "source": source, "mtime": mtime}
+    return latest
+
+##############################################################################
+# SCORE (WORKER)
+##############################################################################
+def score_chunk(task):
+    """
+    Scores a chunk of articles that share one requirements set.
+
+    Args:
+        task (tuple): (requirements, [(path, markdown content), ...])
+
+    Returns:
+        list: One score dict per article (see analysis.score_articles), with "file"
+    """
+    requirements, articles = task
+    # The scoring code prints debug lines; send them to stderr with the progress messages
+    with contextlib.redirect_stdout(sys.stderr):
+        paths = [path for path, _ in articles]
+        scores = score_articles([content for _, content in articles], requirements, names=paths)
+    return [dict(file=path, **row) for path, row in zip(paths, scores.to_dict("records"))]
+
+##############################################################################
+# STATE
+##############################################################################
+def load_rescore_state(output_dir):
+    """Loads the per-file results of the previous run ({} if there is none)."""
+    path = os.path.join(output_dir, RESCORE_STATE_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_rescore_state(state, output_dir):
+    """Writes the per-file results (see cache.write_json_atomic)."""
+    write_json_atomic(os.path.join(output_dir, RESCORE_STATE_FILE), state, ensure_ascii=False)
+
+##############################################################################
+# RESCORE
+##############################################################################
+def rescore_archive(article_paths, requirements_paths, output_dir, max_workers=None, chunk_size=DEFAULT_CHUNK_SIZE, force=False):
+    """
+    Re-scores archived articles against the latest requirements for their
+    keyword and writes a consolidated report.
+
+    An article is scored again only if its content or its requirements
+    changed since the last run; otherwise the stored result is reused.
+    Scoring is spread over a process pool in chunks of chunk_size articles.
+
+    Args:
+        article_paths (list): Directories and/or files holding seo_content_*.md articles
+        requirements_paths (list): batch.py JSONL files and/or CORA workbooks and directories
+        output_dir (str): Directory for the report and the state file
+        max_workers (int): Worker processes (defaults to the CPU count)
+        chunk_size (int): Articles per worker task
+        force (bool): Score every article even if nothing changed
+
+    Returns:
+        dict: {"report": DataFrame of all matched articles, "scored", "skipped", "unmatched"}
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    latest = load_latest_requirements(requirements_paths, max_workers)
+    previous_state = {} if force else load_rescore_state(output_dir)
+
+    state = {}
+    unmatched = []
+    # Articles to score, grouped by the requirements they are scored against
+    pending = {}
+    requirements_by_hash = {}
+    for path in collect_articles(article_paths):
+        match = next((latest[slug] for slug in article_keyword_slugs(path) if slug in latest), None)
+        if match is None:
+            unmatched.append(path)
+            print(f"⚠️ No requirements for {path}", file=sys.stderr)
+            continue
+
+        with open(path, "rb") as f:
+            content_bytes = f.read()
+        if "hash" not in match:
+            match["hash"] = hash_json(match["requirements"])
+            requirements_by_hash[match["hash"]] = match["requirements"]
+        entry = {
+            "primary_keyword": match["requirements"].get("primary_keyword", ""),
+            "requirements_file": match["source"],
+            "content_hash": hash_bytes(content_bytes),
+            "requirements_hash": match["hash"]
+        }
+
+        previous = previous_state.get(path)
+        if previous and all(previous.get(key) == value for key, value in entry.items()):
+            state[path] = previous
+            continue
+        state[path] = entry
+        pending.setdefault(match["hash"], []).append((path, content_bytes.decode("utf-8", errors="replace")))
+
+    tasks = []
+    for requirements_hash, articles in pending.items():
+        for start in range(0, len(articles), chunk_size):
+            tasks.append((requirements_by_hash[requirements_hash], articles[start:start + chunk_size]))
+
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers == 1 or len(tasks) <= 1:
+        results = map(score_chunk, tasks)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=min(max_workers, len(tasks)))
+        results = executor.map(score_chunk, tasks)
+    try:
+        scored = 0
+        for rows in results:
+            for row in rows:
+                state[row["file"]].update(row)
+                scored += 1
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    save_rescore_state(state, output_dir)
+    report = pd.DataFrame(
+        [dict(file=path, **{key: value for key, value in entry.items() if key != "file"}) for path, entry in state.items()]
+    )
+    report.to_csv(os.path.join(output_dir, REPORT_FILE), index=False)
+    return {"report": report, "scored": scored, "skipped": len(state) - scored, "unmatched": unmatched}
+
+##############################################################################
+# COMMAND LINE
+##############################################################################
+def main(argv=None):
+    """Command-line entry point: python rescore.py -r requirements.jsonl [ARCHIVE...] [-o rescore_output]"""
+    parser = argparse.ArgumentParser(description="Re-score archived articles against the latest CORA requirements.")
+    parser.add_argument("archive", nargs="*", default=[".", OUTPUT_DIR], help=f"Directories or seo_content_*.md files (defaults to . and {OUTPUT_DIR})")
+    parser.add_argument("-r", "--requirements", nargs="+", required=True, help="batch.py JSONL files and/or CORA workbooks or directories")
+    parser.add_argument("-o", "--output-dir", default="rescore_output", help="Directory for the report and the incremental state")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Number of worker processes (defaults to CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Articles per worker task")
+    parser.add_argument("--force", action="store_true", help="Score every article even if it is unchanged since the last run")
+    args = parser.parse_args(argv)
+
+    result = rescore_archive(args.archive, args.requirements, args.output_dir, args.jobs, args.chunk_size, args.force)
+    print(
+        f"Scored {result['scored']} article(s), {result['skipped']} unchanged, "
+        f"{len(result['unmatched'])} without requirements; report in {os.path.join(args.output_dir, REPORT_FILE)}",
+        file=sys.stderr
+    )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())